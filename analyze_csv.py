@@ -15,20 +15,22 @@ This script will:
 
 import sys
 import os
+import numpy as np
 import pandas as pd
 
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.config import CSV_PATH
+from src.etl.load_tweets import load_tweets
 
 
 def analyze_csv_data(csv_path: str):
     """Przeanalizuj dane CSV i wyświetl statystyki."""
     print(f"📊 Analiza danych z pliku: {csv_path}")
     
-    # Wczytaj dane do pandas DataFrame
-    df = pd.read_csv(csv_path)
+    # Wczytaj dane do pandas DataFrame (cache Parquet obok pliku CSV)
+    df = load_tweets(csv_path)
     
     print(f"\n📈 Podstawowe statystyki:")
     print(f"  Liczba rekordów: {len(df):,}")
@@ -36,10 +38,13 @@ def analyze_csv_data(csv_path: str):
     print(f"  Rozmiar pliku: {os.path.getsize(csv_path) / (1024*1024):.1f} MB")
     
     print(f"\n🔍 Analiza kolumn:")
+    # Braki i unikalne wartości liczone raz dla całej ramki zamiast dwóch skanów per kolumna
+    null_counts = df.isna().sum()
+    unique_counts = df.nunique(dropna=True)
     for col in df.columns:
-        null_count = df[col].isnull().sum()
+        null_count = null_counts[col]
         null_pct = (null_count / len(df)) * 100
-        unique_count = df[col].nunique()
+        unique_count = unique_counts[col]
         
         print(f"  {col}:")
         print(f"    Brakujące wartości: {null_count:,} ({null_pct:.1f}%)")
@@ -64,24 +69,19 @@ def clean_csv_data(df):
     duplicates_removed = original_count - len(df_cleaned)
     print(f"  Usunięto duplikatów: {duplicates_removed:,}")
     
-    # 2. Sprawdź i wyczyść kolumny tekstowe
-    text_columns = ['user_name', 'user_location', 'user_description', 'text']
+    # 2-5. Kolumny tekstowe (w tym user_name i text) niepuste, date prawidłowa
+    #    Jedna wspólna maska zamiast filtrowania (i kopiowania) ramki osobno dla każdego warunku;
+    #    "\S" sprawdza niepustość bez alokowania przyciętych kopii stringów
+    text_columns = [c for c in ['user_name', 'user_location', 'user_description', 'text'] if c in df_cleaned.columns]
+    conditions = [df_cleaned['date'].notna().to_numpy(dtype=bool)]
+    conditions += [
+        df_cleaned[c].fillna('').str.contains(r'\S', regex=True).to_numpy(dtype=bool)
+        for c in text_columns
+    ]
+    mask = np.logical_and.reduce(conditions)
+    df_cleaned = df_cleaned.loc[mask].copy()
     for col in text_columns:
-        if col in df_cleaned.columns:
-            # Usuń rekordy z pustymi stringami
-            df_cleaned = df_cleaned[df_cleaned[col].fillna('').str.strip() != '']
-            print(f"  Wyczyściono kolumnę {col}")
-    
-    # 3. Sprawdź user_name - musi być unikalny i niepusty
-    df_cleaned = df_cleaned.dropna(subset=['user_name'])
-    df_cleaned = df_cleaned[df_cleaned['user_name'].str.strip() != '']
-    
-    # 4. Sprawdź date - musi być prawidłowa data
-    df_cleaned = df_cleaned.dropna(subset=['date'])
-    
-    # 5. Sprawdź text - musi być niepusty
-    df_cleaned = df_cleaned.dropna(subset=['text'])
-    df_cleaned = df_cleaned[df_cleaned['text'].str.strip() != '']
+        print(f"  Wyczyściono kolumnę {col}")
     
     # 6. Wyczyść hashtags - usuń puste listy i nieprawidłowe formaty
     if 'hashtags' in df_cleaned.columns:
@@ -171,13 +171,14 @@ def show_sample_data(df, n=5):
     print(f"\n📋 Przykładowe dane (pierwsze {n} rekordów):")
     print("-" * 80)
     
-    for i, (_, row) in enumerate(df.head(n).iterrows()):
+    # itertuples: lekkie namedtuple zamiast Series budowanej per wiersz (iterrows)
+    for i, row in enumerate(df.head(n).itertuples(index=False, name='Tweet')):
         print(f"\nRekord {i+1}:")
-        print(f"  User: {row.get('user_name', 'N/A')}")
-        print(f"  Text: {str(row.get('text', 'N/A'))[:100]}...")
-        print(f"  Date: {row.get('date', 'N/A')}")
-        print(f"  Hashtags: {row.get('hashtags', 'N/A')}")
-        print(f"  Followers: {row.get('user_followers', 'N/A')}")
+        print(f"  User: {getattr(row, 'user_name', 'N/A')}")
+        print(f"  Text: {str(getattr(row, 'text', 'N/A'))[:100]}...")
+        print(f"  Date: {getattr(row, 'date', 'N/A')}")
+        print(f"  Hashtags: {getattr(row, 'hashtags', 'N/A')}")
+        print(f"  Followers: {getattr(row, 'user_followers', 'N/A')}")
 
 
 def main():
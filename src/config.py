@@ -8,8 +8,19 @@ PG_PORT = int(os.getenv("PG_PORT", "5432"))
 PG_DB   = os.getenv("POSTGRES_DB", os.getenv("PG_DB", "social"))
 PG_USER = os.getenv("POSTGRES_USER", os.getenv("PG_USER", "user"))
 PG_PASS = os.getenv("POSTGRES_PASSWORD", os.getenv("PG_PASS", "pass"))
+# Wierszy na jedno wielowierszowe INSERT ... VALUES w execute_values
+PG_PAGE_SIZE = int(os.getenv("PG_PAGE_SIZE", "10000"))
+# Tryb benchmarku: tweets/hashtags/tweet_hashtags jako UNLOGGED (bez WAL, dane giną po awarii serwera)
+PG_UNLOGGED = os.getenv("PG_UNLOGGED", "0") == "1"
+# Ścieżka ładowania w src.main: "copy" (COPY FROM STDIN + scalanie), "insert" (execute_values)
+# albo "async" (asyncpg: binarny COPY, słowniki scalane równolegle z puli połączeń)
+PG_LOAD_METHOD = os.getenv("PG_LOAD_METHOD", "copy").lower()
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB  = os.getenv("MONGO_DB", "social")
+# Kompresja protokołu Mongo (kolejność = preferencja); pusty napis wyłącza kompresję
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
 
-CSV_PATH  = os.getenv("CSV_PATH", "data/Bitcoin_tweets.csv")
\ No newline at end of file
+CSV_PATH  = os.getenv("CSV_PATH", "data/Bitcoin_tweets.csv")
+
+USE_POLARS = os.getenv("USE_POLARS", "0") == "1"
\ No newline at end of file
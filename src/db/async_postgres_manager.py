@@ -0,0 +1,159 @@
+import asyncio
+import time
+import uuid
+
+import asyncpg
+
+from src.db.postgres_manager import (
+    DDL,
+    INDEX_DDL,
+    ANALYZE_TABLES,
+    STAGE_COLUMNS,
+    MERGE_STAGE_USERS,
+    MERGE_STAGE_SOURCES,
+    MERGE_STAGE_HASHTAGS,
+    MERGE_STAGE_TWEETS,
+    MERGE_STAGE_TWEET_HASHTAGS,
+    PostgresManager,
+)
+
+# Tabela tymczasowa (TEMP) jest widoczna tylko w swoim połączeniu, a scalanie słowników idzie
+# równolegle z kilku połączeń puli – dlatego staging jest zwykłą tabelą UNLOGGED (bez WAL)
+# z nazwą unikalną dla wywołania, więc równoległe ładowania nie piszą do tej samej tabeli
+STAGE_TABLE_PREFIX = "tweets_staging_async_"
+
+CREATE_SHARED_STAGE = """
+CREATE UNLOGGED TABLE {stage} (
+  tweet_id BIGINT DEFAULT nextval('tweets_id_seq'),
+  user_name TEXT,
+  user_location TEXT,
+  user_description TEXT,
+  user_created TIMESTAMP,
+  user_followers BIGINT,
+  user_friends BIGINT,
+  user_favourites BIGINT,
+  user_verified BOOLEAN,
+  date TIMESTAMP,
+  text TEXT,
+  source TEXT,
+  is_retweet BOOLEAN,
+  hashtags TEXT[]
+)
+"""
+DROP_SHARED_STAGE = "DROP TABLE IF EXISTS {stage}"
+
+
+def _on_shared_stage(sql, stage):
+    """Zapytanie scalające z PostgresManager skierowane na współdzieloną tabelę staging."""
+    return sql.replace("tweets_staging", stage)
+
+
+class AsyncPostgresManager:
+    """
+    Ładowanie do PostgreSQL przez asyncpg (protokół binarny, pula połączeń).
+
+    Wiersze trafiają do staging przez copy_records_to_table (binarny COPY krotek, bez CSV),
+    potem users/sources/hashtags są scalane równolegle (asyncio.gather, osobne połączenia),
+    a tweets/tweet_hashtags – w jednej transakcji, bo zależą od id słowników.
+    """
+
+    def __init__(self, host, port, db, user, password, min_size=4, max_size=8):
+        self._connect_kwargs = dict(host=host, port=port, database=db, user=user, password=password)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        if self.pool is None:
+            self.pool = await asyncpg.create_pool(
+                min_size=self.min_size, max_size=self.max_size, **self._connect_kwargs
+            )
+        return self
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def init_schema(self):
+        # Bez indeksów pomocniczych – buduje je init_indexes() raz, po załadowaniu danych
+        async with self.pool.acquire() as conn:
+            await conn.execute(DDL)
+
+    async def init_indexes(self):
+        async with self.pool.acquire() as conn:
+            await conn.execute(INDEX_DDL)
+            # Świeże statystyki dla planera przed zapytaniami testowymi
+            await conn.execute(ANALYZE_TABLES)
+
+    @staticmethod
+    def _records(df):
+        """Krotki w układzie STAGE_COLUMNS z natywnymi typami Pythona (None zamiast NaN/NaT/NA)."""
+        # Binarny COPY wymaga obiektów datetime – _staging_records parsuje daty przed konwersją
+        return list(PostgresManager._staging_records(df))
+
+    async def _execute(self, sql):
+        async with self.pool.acquire() as conn:
+            await conn.execute(sql)
+
+    async def bulk_load(self, df, build_indexes=True):
+        """
+        Ładuje DataFrame przez binarny COPY do staging i scalanie po stronie serwera; zwraca liczbę wierszy.
+
+        build_indexes=False jak w PostgresManager.bulk_load_copy: przy ładowaniu paczkami
+        indeksy buduje raz init_indexes() po ostatniej paczce.
+        """
+        await self.init_schema()
+        records = self._records(df)
+        stage = STAGE_TABLE_PREFIX + uuid.uuid4().hex
+
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(CREATE_SHARED_STAGE.format(stage=stage))
+                await conn.copy_records_to_table(stage, records=records, columns=STAGE_COLUMNS)
+
+            # Słowniki są od siebie niezależne – trzy INSERT ... SELECT naraz na osobnych połączeniach
+            await asyncio.gather(*(
+                self._execute(_on_shared_stage(sql, stage))
+                for sql in (MERGE_STAGE_USERS, MERGE_STAGE_SOURCES, MERGE_STAGE_HASHTAGS)
+            ))
+
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(_on_shared_stage(MERGE_STAGE_TWEETS, stage))
+                    await conn.execute(_on_shared_stage(MERGE_STAGE_TWEET_HASHTAGS, stage))
+        finally:
+            await self._execute(DROP_SHARED_STAGE.format(stage=stage))
+
+        if build_indexes:
+            await self.init_indexes()
+        return len(records)
+
+    async def load_data_from_dataframe(self, df):
+        """Ładuje dane z DataFrame do PostgreSQL (asyncpg) z pomiarem czasu."""
+        print(f"📥 Ładowanie {len(df):,} rekordów do PostgreSQL (asyncpg)...")
+        start_time = time.perf_counter()
+
+        total = await self.bulk_load(df)
+
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ Załadowano {total:,} rekordów do PostgreSQL w {elapsed:.4f}s")
+        return elapsed
+
+    async def clear_database(self):
+        """Wyczyść wszystkie tabele w bazie danych."""
+        print("🧹 Czyszczenie bazy PostgreSQL...")
+        start_time = time.perf_counter()
+
+        async with self.pool.acquire() as conn:
+            await conn.execute("DROP TABLE IF EXISTS tweet_hashtags, tweets, hashtags, sources, users CASCADE")
+
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ PostgreSQL wyczyszczone w {elapsed:.4f}s")
+        return elapsed
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
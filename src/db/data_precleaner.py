@@ -1,9 +1,64 @@
-from typing import Any, List
 import pandas as pd
 import numpy as np
-import re, ast
+import re
 import time
-from datetime import timedelta
+
+try:
+    import pyarrow
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    pyarrow = None
+    STRING_DTYPE = "string"
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import polars as pl
+    # Błędy konwersji po stronie Polars/Arrow – clean_data_timed wraca wtedy do ścieżki pandas
+    POLARS_ERRORS: tuple = (pl.exceptions.PolarsError,)
+    if pyarrow is not None:
+        POLARS_ERRORS += (pyarrow.ArrowException,)
+except ImportError:
+    pl = None
+    POLARS_ERRORS = ()
+
+from src.config import USE_POLARS
+# Słowo hashtagu (litery Unicode, cyfry, "_") – ten sam wzorzec co w ETL i menedżerach baz
+from src.etl.load_tweets import HASHTAG_PATTERN
+
+REQUIRED_COLUMNS = [
+    "user_name","user_location","user_description","user_created",
+    "user_followers","user_friends","user_favourites","user_verified",
+    "date","text","hashtags","source","is_retweet"
+]
+COUNT_COLUMNS = ["user_followers", "user_friends", "user_favourites"]
+TRUTHY_VALUES = {'true', '1', 'yes', 'y', 't'}
+# Znacznik HTML w kolumnie "source"; klasa znaków zamiast leniwego ".*?" – bez backtrackingu
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _clean_counts_kernel(values, out):
+        # Jeden przebieg: NaN i wartości ujemne → 0, reszta → int64
+        for i in prange(values.shape[0]):
+            v = values[i]
+            out[i] = 0 if (v != v or v < 0) else np.int64(v)
+else:
+    _clean_counts_kernel = None
+
+
+def _clean_counts(values: pd.Series) -> np.ndarray:
+    """Liczniki (followers/friends/favourites) jako int64: braki i wartości ujemne → 0."""
+    a = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if _clean_counts_kernel is not None:
+        out = np.empty(a.shape[0], dtype=np.int64)
+        _clean_counts_kernel(a, out)
+        return out
+    return np.where(np.isnan(a) | (a < 0), 0, a).astype(np.int64)
 
 class DataPrecleaner:
     def __init__(self):
@@ -48,19 +103,22 @@ class DataPrecleaner:
         print("🧹 Czyszczenie danych CSV...")
         start_time = time.perf_counter()
         
-        cleaned_df = self.clean_data(df)
+        # USE_POLARS=1 przełącza na ścieżkę Polars (o ile pakiet jest zainstalowany)
+        cleaned_df = None
+        if USE_POLARS and pl is not None:
+            try:
+                cleaned_df = self.clean_data_polars(df)
+            except POLARS_ERRORS as e:
+                print(f"⚠️  Czyszczenie w Polars nie powiodło się ({e}) – używam pandas")
+        if cleaned_df is None:
+            cleaned_df = self.clean_data(df)
         
         elapsed = time.perf_counter() - start_time
         print(f"✅ Dane wyczyszczone w {elapsed:.4f}s")
         return cleaned_df, elapsed
 
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        required_cols = [
-            "user_name","user_location","user_description","user_created",
-            "user_followers","user_friends","user_favourites","user_verified",
-            "date","text","hashtags","source","is_retweet"
-        ]
-        for col in required_cols:
+        for col in REQUIRED_COLUMNS:
             if col not in df.columns:
                 df[col] = pd.NA
         missing_mask = df["user_name"].isna() | (df["user_name"].astype(str).str.strip() == "")
@@ -75,16 +133,21 @@ class DataPrecleaner:
         df["user_description"] = df["user_description"].fillna("No description").astype(str).str.strip().replace("", "No description")
         df["text"]             = df["text"].fillna("No content").astype(str)
         # Źródło (czasem bywa HTML – szybkie odszumienie)
-        df["source"] = df["source"].fillna("Unknown source").astype(str)
-        df["source"] = df["source"].str.replace(r"<.*?>", "", regex=True).str.strip().replace("", "Unknown source")
+        # Dla stringów Arrow pandas wykonuje regex w pyarrow.compute (RE2); skompilowany obiekt
+        # wymusiłby fallback do `re` per element, więc przekazujemy tekst wzorca
+        df["source"] = df["source"].fillna("Unknown source").astype(STRING_DTYPE)
+        df["source"] = df["source"].str.replace(HTML_TAG_PATTERN.pattern, "", regex=True).str.strip().replace("", "Unknown source")
 
-        # 3) Liczbowe → int (braki = 0)
-        for col in ["user_followers", "user_friends", "user_favourites"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+        # 3) Liczbowe → najmniejszy wystarczający int (braki i wartości ujemne = 0)
+        #    fillna/clip/astype w jednym przebiegu (kernel Numba, gdy dostępna)
+        for col in COUNT_COLUMNS:
+            df[col] = pd.to_numeric(_clean_counts(df[col]), downcast="integer")
 
-        # 4) Bool → True/False
-        df["user_verified"] = df["user_verified"].map(self.__to_bool)
-        df["is_retweet"]    = df["is_retweet"].map(self.__to_bool)
+        # 4) Bool → True/False (wektorowo przez .str/.isin, bez wywołania Pythona per wiersz);
+        #    obie kolumny spłaszczone do jednej serii 2N, więc strip/lower/isin idą jednym przebiegiem
+        bool_cols = ["user_verified", "is_retweet"]
+        flat = pd.Series(df[bool_cols].to_numpy().ravel(order="F")).astype("string").str.strip().str.lower()
+        df[bool_cols] = flat.isin(TRUTHY_VALUES).to_numpy(dtype=bool).reshape(len(bool_cols), -1).T
 
         # 5) Daty
         df["user_created"] = pd.to_datetime(df["user_created"], errors="coerce")
@@ -98,15 +161,18 @@ class DataPrecleaner:
         # data tweeta – kluczowa do porównań czasowych
         df["date"] = pd.to_datetime(df["date"], errors="coerce")
         if df["date"].isna().any():
-            # Użyj forward fill z bardziej efektywnym podejściem
-            df["date"] = df["date"].fillna(method='ffill')
-            # Jeśli nadal są NaT (pierwsze rekordy), wypełnij aktualną datą
-            df["date"] = df["date"].fillna(pd.Timestamp.utcnow())
+            # Braki są sporadyczne – jedna skalarna mediana zamiast przebiegu ffill po kolejności wierszy
+            # (jeśli wszystkie NaT, użyj "now()" bez strefy, by kolumna została datetime64)
+            if df["date"].notna().any():
+                median_date = df["date"].dropna().median()
+            else:
+                median_date = pd.Timestamp.utcnow().tz_localize(None)
+            df["date"] = df["date"].fillna(median_date)
 
         # 6) Hashtagi → lista[str]
-        df["hashtags"] = df["hashtags"].map(self.__parse_hashtags)
-        # gwarancja typu listy
-        df["hashtags"] = df["hashtags"].apply(lambda x: x if isinstance(x, list) else [])
+        #    "['Bitcoin', '#BTC']" → ["bitcoin", "btc"]: jedno lower() i jeden findall na całej kolumnie
+        #    zamiast ast.literal_eval per wiersz; findall zawsze zwraca listę
+        df["hashtags"] = df["hashtags"].fillna("").astype(str).str.lower().str.findall(HASHTAG_PATTERN)
 
         # 7) Finalne uzupełnienia, by nie zostały NaN/NaT
         df = df.fillna({
@@ -116,26 +182,97 @@ class DataPrecleaner:
             "source": "Unknown source",
         })
 
-        # 8) (opcjonalnie) sanity-check typów pod DB
+        # 8) Kompaktowe typy: kategoria dla źródła,
+        #    stringi w ciągłym buforze Arrow zamiast obiektu Pythona per wiersz
+        df["source"] = df["source"].astype("category")
+        for col in ["user_name", "user_location", "user_description", "text"]:
+            df[col] = df[col].astype(STRING_DTYPE)
+
+        # 9) (opcjonalnie) sanity-check typów pod DB
         #  - pandas Timestamp -> ok dla psycopg2/pymongo
         #  - list[str] w "hashtags" -> ok dla Mongo; do CSV można potem joinować
         return df
 
-    def __to_bool(self, value: Any) -> bool:
-        if pd.isna(value):
-            return False
-        s = str(value).strip().lower()
-        return s in ('true', '1', 'yes', 'y', 't')
-    
-    def __parse_hashtags(self, value: Any) -> List[str]:
-        if pd.isna(value) or value == "":
-            return []
-        try:
-            tags = ast.literal_eval(str(value))
-            if isinstance(tags, list):
-                return [str(tag).strip().lstrip("#").lower() for tag in tags if str(tag).strip() ]
-        except Exception:
-            s = str(value).replace("#",' ')
-            return [t.strip().lower() for t in re.split(r"[ ,]+", s) if t.strip()]
-        return []
-    
+    def clean_data_polars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Te same kroki co clean_data, wykonane leniwie i wielowątkowo w Polars."""
+        df = df.copy()
+        for col in REQUIRED_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        # Kolumny object z mieszanką tekstu, NaN i liczb (typowe w CSV tweetów) Arrow odrzuca
+        # przy konwersji – jako pandas "string" trafiają do Polars jako Utf8 z brakami
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].astype("string")
+        lf = pl.from_pandas(df).lazy()
+        schema = lf.collect_schema()
+
+        def as_text(col: str) -> "pl.Expr":
+            return pl.col(col).cast(pl.Utf8)
+
+        def as_datetime(col: str) -> "pl.Expr":
+            if schema[col].is_temporal():
+                return pl.col(col).cast(pl.Datetime("us"))
+            return as_text(col).str.to_datetime(strict=False, time_unit="us")
+
+        def fill_median(col: str, fallback) -> "pl.Expr":
+            return pl.coalesce(pl.col(col), pl.col(col).median(), pl.lit(fallback))
+
+        def or_default(expr: "pl.Expr", default: str) -> "pl.Expr":
+            return pl.when(expr == "").then(pl.lit(default)).otherwise(expr).alias(expr.meta.output_name())
+
+        # 1) Braki user_name → unknown_user_<n> (numeracja kolejnych braków jak w clean_data)
+        name = as_text("user_name")
+        name_missing = name.is_null() | (name.str.strip_chars() == "")
+        now = pd.Timestamp.utcnow().tz_localize(None).to_pydatetime()
+
+        lf = lf.with_columns(
+            pl.when(name_missing)
+              .then(pl.lit("unknown_user_") + name_missing.cum_sum().cast(pl.Utf8))
+              .otherwise(name)
+              .alias("user_name"),
+            # 2) Teksty – uzupełnienia domyślne
+            or_default(as_text("user_location").fill_null("unknown").str.strip_chars(), "unknown"),
+            or_default(as_text("user_description").fill_null("No description").str.strip_chars(), "No description"),
+            as_text("text").fill_null("No content"),
+            or_default(
+                as_text("source").fill_null("Unknown source")
+                    .str.replace_all(HTML_TAG_PATTERN.pattern, "").str.strip_chars(),
+                "Unknown source",
+            ),
+            # 3) Liczbowe: braki, NaN i wartości ujemne → 0
+            *[
+                pl.col(col).cast(pl.Float64, strict=False).fill_nan(None).fill_null(0)
+                  .clip(lower_bound=0).cast(pl.Int64)
+                for col in COUNT_COLUMNS
+            ],
+            # 4) Bool
+            *[
+                as_text(col).str.strip_chars().str.to_lowercase()
+                  .is_in(list(TRUTHY_VALUES)).fill_null(False)
+                for col in ["user_verified", "is_retweet"]
+            ],
+            # 5) Daty
+            as_datetime("user_created"),
+            as_datetime("date"),
+            # 6) Hashtagi → lista[str]
+            as_text("hashtags").fill_null("").str.to_lowercase().str.extract_all(HASHTAG_PATTERN.pattern),
+        ).with_columns(
+            fill_median("user_created", now),
+            fill_median("date", now),
+        )
+
+        # Bufory Arrow przechodzą do pandas bez kopiowania; potem te same typy co w clean_data
+        out = lf.collect().to_pandas(use_pyarrow_extension_array=True)
+        for col in COUNT_COLUMNS:
+            out[col] = pd.to_numeric(out[col].to_numpy(dtype="int64"), downcast="integer")
+        for col in ["user_verified", "is_retweet"]:
+            out[col] = out[col].to_numpy(dtype=bool)
+        for col in ["user_created", "date"]:
+            out[col] = out[col].astype("datetime64[ns]")
+        out["hashtags"] = pd.Series(out["hashtags"].tolist(), index=out.index, dtype=object)
+        out["source"] = out["source"].astype(STRING_DTYPE).astype("category")
+        for col in ["user_name", "user_location", "user_description", "text"]:
+            out[col] = out[col].astype(STRING_DTYPE)
+        return out
+
@@ -1,12 +1,38 @@
 from pymongo import MongoClient, ASCENDING
+from pymongo.write_concern import WriteConcern
 import time
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, Iterator, List
+
+from src.config import MONGO_COMPRESSORS
+from src.etl.load_tweets import HASHTAG_PATTERN
+
+
+# Ile batchy insert_many może czekać na potwierdzenie serwera, zanim wątek główny się zatrzyma
+MAX_INFLIGHT_BATCHES = 2
+
+DOCUMENT_COLUMNS = [
+    "user_name", "user_location", "user_description", "user_created",
+    "user_followers", "user_friends", "user_favourites", "user_verified",
+    "date", "text", "hashtags", "source", "is_retweet",
+]
 
 class MongoManager:
-    def __init__(self, mongo_uri, db_name="social"):
-        self.client = MongoClient(mongo_uri)
+    def __init__(self, mongo_uri, db_name="social", compressors=MONGO_COMPRESSORS):
+        # Kompresja protokołu: pierwszy z listy kompresor, który wspiera też serwer. Pozycję bez
+        # zainstalowanego modułu (np. zstd bez pakietu zstandard) pymongo pomija z UserWarning;
+        # zlib korzysta z biblioteki standardowej. Pusta lista = połączenie bez kompresji.
+        # Tekstowe pola tweetów (text, user_description) kompresują się kilkukrotnie – mniej bajtów w sieci
+        compressor_list = [c.strip() for c in (compressors or "").split(",") if c.strip()]
+        compression = {"compressors": ",".join(compressor_list), "zlibCompressionLevel": 1} if compressor_list else {}
+        self.client = MongoClient(mongo_uri, **compression)
         self.db = self.client[db_name]
         self.col = self.db["tweets"]
+        # Widok kolekcji dla ładowania masowego: potwierdzenie z primary bez czekania na journal;
+        # zapytania i testy CRUD używają self.col z domyślnym write concern
+        self.load_col = self.col.with_options(write_concern=WriteConcern(w=1, j=False))
     
     def init_indexes(self):
         """Create indexes for better query performance"""
@@ -40,16 +66,18 @@ class MongoManager:
         print(f"✅ MongoDB wyczyszczone w {elapsed:.4f}s")
         return elapsed
     
+    @staticmethod
+    def _normalize_hashtags(hashtags) -> List[str]:
+        """Lista hashtagów: parsuje zapis tekstowy listy, bez "#", małymi literami."""
+        hashtags = hashtags or []
+        if isinstance(hashtags, str):
+            # Zwykle ETL dostarcza już listę; dla tekstu wystarczy jeden findall zamiast ast.literal_eval
+            return HASHTAG_PATTERN.findall(hashtags.lower())
+        return [str(h).strip().lstrip("#").lower() for h in hashtags if str(h).strip()]
+
     def _build_document(self, row_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Buduje dokument MongoDB z wiersza DataFrame."""
-        hashtags = row_dict.get("hashtags") or []
-        if isinstance(hashtags, str):
-            try:
-                import ast
-                hashtags = ast.literal_eval(hashtags)
-            except:
-                hashtags = []
-        hashtags = [str(h).strip().lstrip("#").lower() for h in hashtags if str(h).strip()]
+        hashtags = self._normalize_hashtags(row_dict.get("hashtags"))
         
         return {
             "user": {
@@ -68,33 +96,67 @@ class MongoManager:
             "source": row_dict.get("source") or None,
             "is_retweet": bool(row_dict.get("is_retweet")) if row_dict.get("is_retweet") is not None else False,
         }
+
+    def _iter_documents(self, df) -> Iterator[Dict[str, Any]]:
+        """Buduje dokumenty MongoDB kolumnami: każda kolumna wyciągana raz, potem dostęp po pozycji."""
+        n = len(df)
+        # tolist() zamiast to_numpy(): natywne typy Pythona (BSON nie koduje skalarów numpy)
+        cols = {c: (df[c].tolist() if c in df.columns else [None] * n) for c in DOCUMENT_COLUMNS}
+        user_name, user_location, user_description = cols["user_name"], cols["user_location"], cols["user_description"]
+        user_created, user_followers = cols["user_created"], cols["user_followers"]
+        user_friends, user_favourites, user_verified = cols["user_friends"], cols["user_favourites"], cols["user_verified"]
+        date, text, hashtags = cols["date"], cols["text"], cols["hashtags"]
+        source, is_retweet = cols["source"], cols["is_retweet"]
+        normalize_hashtags = self._normalize_hashtags
+
+        for i in range(n):
+            yield {
+                "user": {
+                    "user_name": user_name[i],
+                    "user_location": user_location[i],
+                    "user_description": user_description[i],
+                    "user_created": user_created[i],
+                    "user_followers": user_followers[i],
+                    "user_friends": user_friends[i],
+                    "user_favourites": user_favourites[i],
+                    "user_verified": bool(user_verified[i]) if user_verified[i] is not None else False,
+                },
+                "date": date[i],
+                "text": text[i],
+                "hashtags": normalize_hashtags(hashtags[i]),
+                "source": source[i] or None,
+                "is_retweet": bool(is_retweet[i]) if is_retweet[i] is not None else False,
+            }
     
     def load_data_from_dataframe(self, df, batch_size=1000):
         """Ładuje dane z DataFrame do MongoDB z pomiarem czasu."""
         print(f"📥 Ładowanie {len(df):,} rekordów do MongoDB...")
         start_time = time.perf_counter()
         
-        # Inicjalizuj indeksy
-        self.init_indexes()
-        
-        from pymongo import InsertOne
-        mongo_ops: List[InsertOne] = []
+        # Kolumny wyciągnięte raz, dokumenty składane po indeksie zamiast dict.get per pole i wiersz
+        docs: Iterator[Dict[str, Any]] = self._iter_documents(df)
         total = 0
-        
-        for _, row in df.iterrows():
-            row_dict = row.to_dict()
-            doc = self._build_document(row_dict)
-            mongo_ops.append(InsertOne(doc))
-            
-            total += 1
-            if total % batch_size == 0:
-                self.col.bulk_write(mongo_ops, ordered=False)
-                mongo_ops.clear()
-        
-        # Final flush
-        if mongo_ops:
-            self.col.bulk_write(mongo_ops, ordered=False)
-        
+
+        # insert_many bez wrapperów InsertOne; generator + islice buduje batch po batchu.
+        # Wysyłka idzie w puli wątków (pymongo zwalnia GIL na I/O), a wątek główny w tym czasie
+        # składa kolejny batch; najwyżej MAX_INFLIGHT_BATCHES w locie ogranicza zużycie pamięci
+        pending: deque = deque()
+        with ThreadPoolExecutor(max_workers=MAX_INFLIGHT_BATCHES) as pool:
+            while True:
+                batch = list(islice(docs, batch_size))
+                if not batch:
+                    break
+                if len(pending) >= MAX_INFLIGHT_BATCHES:
+                    total += len(pending.popleft().result().inserted_ids)
+                pending.append(pool.submit(
+                    self.load_col.insert_many, batch, ordered=False, bypass_document_validation=True
+                ))
+            while pending:
+                total += len(pending.popleft().result().inserted_ids)
+
+        # Indeksy budowane raz po załadowaniu zamiast aktualizacji B-drzew przy każdym insercie
+        self.init_indexes()
+
         elapsed = time.perf_counter() - start_time
         print(f"✅ Załadowano {total:,} rekordów do MongoDB w {elapsed:.4f}s")
         return elapsed
@@ -1,7 +1,12 @@
-from os import curdir
+import functools
+import io
 import psycopg2
 import time
-from psycopg2.extras import execute_batch
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from src.config import PG_PAGE_SIZE
+from src.etl.load_tweets import HASHTAG_PATTERN
 
 DDL = """
 CREATE TABLE IF NOT EXISTS users (
@@ -40,10 +45,28 @@ CREATE TABLE IF NOT EXISTS tweet_hashtags (
   hashtag_id INT REFERENCES hashtags(id) ON DELETE CASCADE,
   PRIMARY KEY (tweet_id, hashtag_id)
 );
+"""
 
+# Indeksy pomocnicze osobno: ładowanie masowe usuwa je na czas COPY i buduje raz na końcu
+INDEX_DDL = """
 CREATE INDEX IF NOT EXISTS idx_tweets_user_date ON tweets(user_id, date);
 CREATE INDEX IF NOT EXISTS idx_hashtag_tag ON hashtags(tag);
 """
+DROP_INDEXES = "DROP INDEX IF EXISTS idx_tweets_user_date, idx_hashtag_tag;"
+
+# Ustawienia tylko na czas transakcji ładowania: commit bez czekania na fsync WAL,
+# więcej pamięci na budowę indeksów
+BULK_LOAD_SETTINGS = """
+SET LOCAL synchronous_commit = OFF;
+SET LOCAL maintenance_work_mem = '512MB';
+"""
+ANALYZE_TABLES = "ANALYZE users, sources, tweets, hashtags, tweet_hashtags;"
+
+# Tryb benchmarku: tabele bez WAL (UNLOGGED) – szybsze wstawianie kosztem utraty danych po awarii.
+# users/sources zostają logowane, bo tabela UNLOGGED może wskazywać kluczem obcym na zwykłą, ale nie odwrotnie
+UNLOGGED_TABLES = ["tweets", "hashtags", "tweet_hashtags"]
+# SET LOGGED wymaga, by tabele wskazywane kluczami obcymi były już logowane – tweet_hashtags na końcu
+SET_LOGGED = "".join(f"ALTER TABLE IF EXISTS {table} SET LOGGED;\n" for table in UNLOGGED_TABLES)
 
 INSERT_USER = """
 INSERT INTO users (user_name, user_location, user_description, user_created,
@@ -67,7 +90,7 @@ RETURNING id;
 """
 
 GET_SOURCE_ID = "SELECT id FROM sources WHERE name=%s"
-GET_USER_ID = "SELECT id FROM users WHERE user_name=%s"
+ALL_SOURCE_IDS = "SELECT name, id FROM sources"
 INSERT_TWEET = """
 INSERT INTO tweets(user_id, date, text, source_id, is_retweet)
 VALUES (%s,%s,%s,%s,%s)
@@ -80,235 +103,731 @@ ON CONFLICT (tag) DO NOTHING
 RETURNING id;
 """
 GET_HASHTAG_ID = "SELECT id FROM hashtags WHERE tag=%s"
-INSERT_TWEET_HASHTAG = """
-INSERT INTO tweet_hashtags(tweet_id, hashtag_id)
-VALUES (%s,%s) ON CONFLICT DO NOTHING;
+ALL_HASHTAG_IDS = "SELECT tag, id FROM hashtags"
+
+# Warianty wielowierszowe dla execute_values (placeholder "VALUES %s")
+# Użytkownicy dwuetapowo: nowi przez ON CONFLICT DO NOTHING (RETURNING zwraca tylko wstawionych),
+# id pozostałych jednym SELECT ... = ANY, a UPDATE tylko dla wierszy, których treść się zmieniła
+INSERT_USERS_BULK = """
+INSERT INTO users (user_name, user_location, user_description, user_created,
+                   user_followers, user_friends, user_favourites, user_verified)
+VALUES %s
+ON CONFLICT (user_name) DO NOTHING
+RETURNING user_name;
+"""
+GET_USER_IDS = "SELECT id, user_name FROM users WHERE user_name = ANY(%s)"
+UPDATE_USERS_BULK = """
+UPDATE users AS u
+SET user_location = v.user_location,
+    user_description = v.user_description,
+    user_created = v.user_created,
+    user_followers = v.user_followers,
+    user_friends = v.user_friends,
+    user_favourites = v.user_favourites,
+    user_verified = v.user_verified
+FROM (VALUES %s) AS v(user_name, user_location, user_description, user_created,
+                      user_followers, user_friends, user_favourites, user_verified)
+WHERE u.user_name = v.user_name;
+"""
+# Jawne typy w VALUES – kolumna z samymi NULL-ami nie może zostać typu text
+USER_ROW_TEMPLATE = "(%s,%s,%s,%s::timestamp,%s::bigint,%s::bigint,%s::bigint,%s::boolean)"
+INSERT_SOURCES_BULK = "INSERT INTO sources(name) VALUES %s ON CONFLICT (name) DO NOTHING;"
+GET_SOURCE_IDS = "SELECT id, name FROM sources WHERE name = ANY(%s)"
+NEXT_TWEET_IDS = "SELECT nextval('tweets_id_seq') FROM generate_series(1, %s)"
+INSERT_TWEETS_BULK = "INSERT INTO tweets(id, user_id, date, text, source_id, is_retweet) VALUES %s;"
+INSERT_HASHTAGS_BULK = "INSERT INTO hashtags(tag) VALUES %s ON CONFLICT (tag) DO NOTHING;"
+GET_HASHTAG_IDS = "SELECT id, tag FROM hashtags WHERE tag = ANY(%s)"
+INSERT_TWEET_HASHTAGS_BULK = "INSERT INTO tweet_hashtags(tweet_id, hashtag_id) VALUES %s ON CONFLICT DO NOTHING;"
+
+# Ładowanie przez COPY: jedna szeroka tabela tymczasowa, potem scalanie zapytaniami INSERT ... SELECT.
+# tweet_id jest nadawane z sekwencji tabeli tweets już podczas COPY (w kolejności wierszy),
+# więc ten sam identyfikator łączy tweet z jego hashtagami.
+STAGE_COLUMNS = [
+    "user_name", "user_location", "user_description", "user_created",
+    "user_followers", "user_friends", "user_favourites", "user_verified",
+    "date", "text", "source", "is_retweet", "hashtags"
+]
+
+CREATE_STAGE = """
+CREATE TEMP TABLE IF NOT EXISTS tweets_staging (
+  tweet_id BIGINT DEFAULT nextval('tweets_id_seq'),
+  user_name TEXT,
+  user_location TEXT,
+  user_description TEXT,
+  user_created TIMESTAMP,
+  user_followers BIGINT,
+  user_friends BIGINT,
+  user_favourites BIGINT,
+  user_verified BOOLEAN,
+  date TIMESTAMP,
+  text TEXT,
+  source TEXT,
+  is_retweet BOOLEAN,
+  hashtags TEXT[]
+) ON COMMIT DROP;
+TRUNCATE tweets_staging;
 """
 
+COPY_STAGE = (
+    f"COPY tweets_staging ({', '.join(STAGE_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+)
+
+# DISTINCT ON + ORDER BY tweet_id DESC: wygrywa ostatni wiersz użytkownika, jak przy upsert_user w pętli
+MERGE_STAGE_USERS = """
+INSERT INTO users (user_name, user_location, user_description, user_created,
+                   user_followers, user_friends, user_favourites, user_verified)
+SELECT DISTINCT ON (user_name)
+       user_name, user_location, user_description, user_created,
+       user_followers, user_friends, user_favourites, user_verified
+FROM tweets_staging
+WHERE user_name IS NOT NULL
+ORDER BY user_name, tweet_id DESC
+ON CONFLICT (user_name) DO UPDATE
+SET user_location = EXCLUDED.user_location,
+    user_description = EXCLUDED.user_description,
+    user_created = EXCLUDED.user_created,
+    user_followers = EXCLUDED.user_followers,
+    user_friends = EXCLUDED.user_friends,
+    user_favourites = EXCLUDED.user_favourites,
+    user_verified = EXCLUDED.user_verified;
+"""
+
+MERGE_STAGE_SOURCES = """
+INSERT INTO sources (name)
+SELECT DISTINCT source FROM tweets_staging
+WHERE source IS NOT NULL AND source <> ''
+ON CONFLICT (name) DO NOTHING;
+"""
+
+# Normalizacja hashtagów po stronie serwera (jak _as_tag_list): staging trzyma surowe tagi,
+# a funkcja w FROM (niejawnie LATERAL) zamienia każdy na postać kanoniczną bez "#", małymi literami
+NORMALIZED_TAGS = "unnest(s.hashtags) AS raw(tag), lower(ltrim(btrim(raw.tag, E' \\t\\r\\n'), '#')) AS t(tag)"
+
+MERGE_STAGE_HASHTAGS = f"""
+INSERT INTO hashtags (tag)
+SELECT DISTINCT t.tag FROM tweets_staging s, {NORMALIZED_TAGS}
+WHERE t.tag <> ''
+ON CONFLICT (tag) DO NOTHING;
+"""
+
+MERGE_STAGE_TWEETS = """
+INSERT INTO tweets (id, user_id, date, text, source_id, is_retweet)
+SELECT s.tweet_id, u.id, s.date, s.text, src.id, s.is_retweet
+FROM tweets_staging s
+LEFT JOIN users u ON u.user_name = s.user_name
+LEFT JOIN sources src ON src.name = s.source;
+"""
+
+MERGE_STAGE_TWEET_HASHTAGS = f"""
+INSERT INTO tweet_hashtags (tweet_id, hashtag_id)
+SELECT DISTINCT s.tweet_id, h.id
+FROM tweets_staging s, {NORMALIZED_TAGS}
+JOIN hashtags h ON h.tag = t.tag
+ON CONFLICT DO NOTHING;
+"""
+
+TRUTHY_VALUES = {'true', '1', '1.0', 'yes', 'y', 't'}
+# Wierszy zbieranych przed wysłaniem paczki w ładowaniu INSERT-ami –
+# powyżej ~10 tys. wierszy zysk z większych paczek jest już znikomy
+DEFAULT_BATCH_SIZE = 10_000
+# Wierszy na transakcję w ładowaniu INSERT-ami – każdy commit to fsync WAL,
+# więc paczki execute_values nie są commitowane osobno
+COMMIT_EVERY_ROWS = 100_000
+
+# Instrukcje przygotowywane po stronie serwera (PREPARE) dla pętli wiersz-po-wierszu:
+# parsowanie i planowanie raz na sesję zamiast przy każdym execute
+PREPARED_STATEMENTS = {
+    "ins_user": INSERT_USER,
+    "ins_tweet": INSERT_TWEET,
+    "get_source": GET_SOURCE_ID,
+    "ins_source": INSERT_SOURCE,
+    "get_hashtag": GET_HASHTAG_ID,
+    "ins_hashtag": INSERT_HASHTAG,
+}
+
+
+def _as_tag_list(value):
+    """Lista hashtagów z listy albo z jej tekstowej reprezentacji ("['a', 'b']")."""
+    if isinstance(value, str):
+        # Zwykle ETL dostarcza już listę; dla tekstu wystarczy jeden findall zamiast ast.literal_eval
+        return HASHTAG_PATTERN.findall(value.lower())
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(tag).strip().lstrip("#").lower() for tag in value if str(tag).strip()]
+
+
+def _raw_tag_list(value):
+    """Surowe tagi dla tabeli staging – normalizację (trim, "#", lower) robi serwer w NORMALIZED_TAGS."""
+    if isinstance(value, str):
+        return HASHTAG_PATTERN.findall(value)
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(tag) for tag in value]
+
+
+def _schema_ddl(unlogged=False):
+    """DDL schematu; przy unlogged=True tabele z UNLOGGED_TABLES są tworzone jako UNLOGGED."""
+    if not unlogged:
+        return DDL
+    ddl = DDL
+    for table in UNLOGGED_TABLES:
+        ddl = ddl.replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE UNLOGGED TABLE IF NOT EXISTS {table} (")
+    return ddl
+
+
+def _user_digest(values):
+    """Skrót treści wiersza użytkownika (bez user_name); braki (NaN/NaT/NA) zrównane z None."""
+    # hash(float('nan')) zależy od tożsamości obiektu (NaN != NaN), więc bez normalizacji
+    # każdy wiersz z NaN dawałby nowy skrót i niepotrzebny UPDATE przy każdym batchu
+    return hash(tuple(
+        None if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and v != v) else v
+        for v in values[1:]
+    ))
+
+
+def _opt_bool(value):
+    """bool(value), z zachowaniem braku wartości (None) jako NULL."""
+    return bool(value) if value is not None else None
+
+
+def _to_positional(sql):
+    """Zamienia kolejne placeholdery %s na $1, $2, ... (składnia PREPARE)."""
+    parts = sql.split("%s")
+    return parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+
+
+def _execute_sql(name, n_params):
+    """EXECUTE name(%s,...) dla instrukcji przygotowanej z n_params parametrami."""
+    return f"EXECUTE {name}({','.join(['%s'] * n_params)})"
+
+
+def _pg_text_array(tags):
+    """Literał tablicy PostgreSQL TEXT[] ({"a","b"}) z escapowaniem cudzysłowów i backslashy."""
+    quoted = ('"' + t.replace("\\", "\\\\").replace('"', '\\"') + '"' for t in tags)
+    return "{" + ",".join(quoted) + "}"
+
+def _recover_on_error(method):
+    """Po błędzie bazy wycofuje transakcję i czyści stan menedżera, potem przekazuje wyjątek dalej."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except psycopg2.Error:
+            self._recover()
+            raise
+    return wrapper
+
 class PostgresManager:
     def __init__(self, host, port, db, user, password):
         self.conn = psycopg2.connect(host=host, port=port, dbname=db, user=user, password=password)
         self.conn.autocommit = False
+        # Jeden długo żyjący kursor zamiast nowego obiektu przy każdym wierszu
+        self.cur = self.conn.cursor()
+        self._prepared = False
+        self._pending_links = []
+        self._reset_caches()
+
+    def _reset_caches(self):
+        # Mapy nazwa → id dla źródeł i hashtagów; None = jeszcze nie wczytane z bazy
+        self._source_cache = None
+        self._hashtag_cache = None
+        # Skróty treści ostatnio zapisanych użytkowników i ich id (upsert_user, upsert_users_bulk)
+        self._user_digests = {}
+        self._user_ids = {}
+
+    def _recover(self):
+        # Przerwana transakcja blokuje każde kolejne polecenie na tym połączeniu – rollback,
+        # a id w cache i zbuforowane powiązania mogły pochodzić z wycofanych wierszy
+        if self.conn.closed:
+            return
+        self.conn.rollback()
+        if self.cur.closed:
+            self.cur = self.conn.cursor()
+        self._pending_links = []
+        self._reset_caches()
+
+    def _warm_caches(self):
+        # Jedno zapytanie na tabelę słownikową: wszystkie znane źródła i hashtagi do pamięci
+        if self._source_cache is None:
+            self._source_cache = self._fetch_id_map(ALL_SOURCE_IDS)
+        if self._hashtag_cache is None:
+            self._hashtag_cache = self._fetch_id_map(ALL_HASHTAG_IDS)
+
+    def _fetch_id_map(self, sql):
+        self.cur.execute(sql)
+        return dict(self.cur.fetchall())
+
+    def _execute_prepared(self, name, values):
+        # EXECUTE instrukcji z PREPARED_STATEMENTS; przed init_schema – zwykłe zapytanie
+        if self._prepared:
+            self.cur.execute(_execute_sql(name, len(values)), values)
+        else:
+            self.cur.execute(PREPARED_STATEMENTS[name], values)
+
+    def _get_or_create_id(self, key, get_name, insert_name):
+        self._execute_prepared(get_name, (key,))
+        found = self.cur.fetchone()
+        if found:
+            return found[0]
+        self._execute_prepared(insert_name, (key,))
+        created = self.cur.fetchone()
+        if created:
+            return created[0]
+        self._execute_prepared(get_name, (key,))
+        return self.cur.fetchone()[0]
     
-    def init_schema(self):
-        with self.conn.cursor() as cur:
-            cur.execute(DDL)
+    def _prepare_statements(self):
+        # Instrukcje przygotowane żyją do końca sesji – przygotowujemy je tylko raz
+        if self._prepared:
+            return
+        for name, sql in PREPARED_STATEMENTS.items():
+            self.cur.execute(f"PREPARE {name} AS {_to_positional(sql)}")
+        self._prepared = True
+
+    @_recover_on_error
+    def init_schema(self, unlogged=False, with_indexes=True):
+        # unlogged dotyczy tylko tworzonych tabel – istniejące zostają bez zmian (IF NOT EXISTS);
+        # with_indexes=False odkłada indeksy pomocnicze do init_indexes() po ładowaniu
+        self.cur.execute(_schema_ddl(unlogged))
+        if with_indexes:
+            self.cur.execute(INDEX_DDL)
+        self._prepare_statements()
+        self.conn.commit()
+
+    @_recover_on_error
+    def init_indexes(self):
+        """Buduje indeksy pomocnicze (jeden posortowany skan na indeks) i odświeża statystyki planera."""
+        self.cur.execute(INDEX_DDL)
+        self.cur.execute(ANALYZE_TABLES)
         self.conn.commit()
     
-    def init_schema_timed(self):
+    @_recover_on_error
+    def set_logged(self):
+        """Przełącza tabele UNLOGGED z powrotem na logowane (np. gdy dane mają przetrwać awarię)."""
+        # Przepisuje całe tabele do WAL – wywoływać raz, po zakończeniu ładowania
+        self.cur.execute(SET_LOGGED)
+        self.conn.commit()
+
+    def init_schema_timed(self, unlogged=False):
         """Inicjalizuj schemat z pomiarem czasu."""
         print("🧱 Inicjalizacja schematu PostgreSQL...")
         start_time = time.perf_counter()
         
-        self.init_schema()
+        self.init_schema(unlogged=unlogged)
         
         elapsed = time.perf_counter() - start_time
         print(f"✅ Schemat PostgreSQL zainicjalizowany w {elapsed:.4f}s")
         return elapsed
     
+    @staticmethod
+    def _user_values(row):
+        return (
+            row["user_name"],
+            row.get("user_location"),
+            row.get("user_description"),
+            row.get("user_created"),
+            row.get("user_followers"),
+            row.get("user_friends"),
+            row.get("user_favourites"),
+            _opt_bool(row.get("user_verified"))
+        )
+
     def upsert_user(self, row):
-        with self.conn.cursor() as cur:
-            cur.execute(INSERT_USER, (
-                row["user_name"],
-                row.get("user_location"),
-                row.get("user_description"),
-                row.get("user_created"),
-                row.get("user_followers"),
-                row.get("user_friends"),
-                row.get("user_favourites"),
-                bool(row.get("user_verified")) if row.get("user_verified") is not None else None
-            ))
-            uid = cur.fetchone()[0]
-        self.conn.commit()
+        # Bez commitu per wiersz – wywołujący robi commit() co batch
+        values = self._user_values(row)
+        # Ten sam użytkownik z niezmienionymi danymi (kolejny jego tweet) – id z pamięci, bez UPDATE
+        name, digest = values[0], _user_digest(values)
+        if self._user_digests.get(name) == digest and name in self._user_ids:
+            return self._user_ids[name]
+        self._execute_prepared("ins_user", values)
+        uid = self.cur.fetchone()[0]
+        self._user_ids[name] = uid
+        self._user_digests[name] = digest
         return uid
 
     def get_or_create_source(self, name):
         if not name:
             return None
-        with self.conn.cursor() as cur:
-            cur.execute(GET_SOURCE_ID, (name,))
-            source_id = cur.fetchone()
-            if source_id:
-                return source_id[0]
-            cur.execute(INSERT_SOURCE, (name,))
-            source = cur.fetchone()
-            if source:
-                return source[0]
-            cur.execute(GET_SOURCE_ID, (name,))
-            return cur.fetchone()[0]
+        # Źródeł jest kilkaset na miliony tweetów – przy pierwszym wywołaniu wczytujemy
+        # wszystkie naraz, potem do bazy idą tylko naprawdę nowe nazwy
+        self._warm_caches()
+        if name not in self._source_cache:
+            self._source_cache[name] = self._get_or_create_id(name, "get_source", "ins_source")
+        return self._source_cache[name]
 
     def insert_tweet(self, user_id, row, source_id):
-        with self.conn.cursor() as cur:
-            cur.execute(INSERT_TWEET, (
-                user_id,
-                row["date"],
-                row["text"],
-                source_id,
-                bool(row.get('is_retweet')) if row.get('is_retweet') is not None else None                
-            ))
-            tweet_id = cur.fetchone()[0]        
+        values = (
+            user_id,
+            row["date"],
+            row["text"],
+            source_id,
+            _opt_bool(row.get('is_retweet'))
+        )
+        self._execute_prepared("ins_tweet", values)
+        tweet_id = self.cur.fetchone()[0]        
         return tweet_id
     
     def get_or_create_hashtag(self, tag):        
-        with self.conn.cursor() as cur:
-            cur.execute(GET_HASHTAG_ID, (tag,))
-            hashtag_id = cur.fetchone()
-            if hashtag_id:
-                return hashtag_id[0]
-            cur.execute(INSERT_HASHTAG, (tag,))
-            hashtag = cur.fetchone()
-            if hashtag:
-                return hashtag[0]
-            cur.execute(GET_HASHTAG_ID, (tag,))
-            return cur.fetchone()[0]
+        # tag musi być już znormalizowany (_as_tag_list) – klucz cache jest kanoniczny
+        self._warm_caches()
+        if tag not in self._hashtag_cache:
+            self._hashtag_cache[tag] = self._get_or_create_id(tag, "get_hashtag", "ins_hashtag")
+        return self._hashtag_cache[tag]
 
     def link_tweet_hashtag(self, tweet_id, hashtag_id):
-        with self.conn.cursor() as cur:
-            cur.execute(INSERT_TWEET_HASHTAG, (tweet_id, hashtag_id))
+        # Para trafia do bufora; wysyłka paczką w flush_links() (najpóźniej przy commit())
+        self._pending_links.append((tweet_id, hashtag_id))
+
+    def flush_links(self, page_size=PG_PAGE_SIZE):
+        """Wstawia zbuforowane pary (tweet_id, hashtag_id) jednym execute_values na stronę."""
+        if self._pending_links:
+            self.link_tweet_hashtags_bulk(self._pending_links, page_size=page_size)
+            self._pending_links = []
+
+    def upsert_users_bulk(self, rows, page_size=PG_PAGE_SIZE):
+        """
+        Upsert wielu użytkowników (INSERT nowych, UPDATE zmienionych); zwraca {user_name: id}.
+
+        Wiersze to krotki w kolejności kolumn INSERT_USER (jak zwraca _user_values).
+        """
+        # Deduplikacja po user_name – wygrywa ostatni wiersz, jak przy upsert_user w pętli
+        values = {row[0]: row for row in rows}
+        if not values:
+            return {}
+        inserted = {name for (name,) in execute_values(
+            self.cur, INSERT_USERS_BULK, list(values.values()),
+            template=USER_ROW_TEMPLATE, page_size=page_size, fetch=True
+        )}
+        # Skrót treści per użytkownik: UPDATE tylko gdy dane różnią się od ostatnio zapisanych
+        # (użytkownik nieznany w tej sesji jest aktualizowany – nie wiemy, co jest w bazie)
+        digests = {name: _user_digest(v) for name, v in values.items()}
+        changed = [
+            v for name, v in values.items()
+            if name not in inserted and self._user_digests.get(name) != digests[name]
+        ]
+        if changed:
+            execute_values(self.cur, UPDATE_USERS_BULK, changed, template=USER_ROW_TEMPLATE, page_size=page_size)
+        self._user_digests.update(digests)
+
+        self.cur.execute(GET_USER_IDS, (list(values),))
+        user_ids = {name: uid for uid, name in self.cur.fetchall()}
+        self._user_ids.update(user_ids)
+        return user_ids
+
+    def get_or_create_sources_bulk(self, names, page_size=PG_PAGE_SIZE):
+        """Wstawia brakujące źródła i zwraca {name: id} dla wszystkich podanych nazw."""
+        names = {name for name in names if name}
+        self._warm_caches()
+        # Do bazy trafiają tylko nazwy spoza cache
+        missing = [name for name in names if name not in self._source_cache]
+        if missing:
+            execute_values(self.cur, INSERT_SOURCES_BULK, [(name,) for name in missing], page_size=page_size)
+            self.cur.execute(GET_SOURCE_IDS, (missing,))
+            self._source_cache.update((name, sid) for sid, name in self.cur.fetchall())
+        return {name: self._source_cache[name] for name in names}
+
+    def insert_tweets_bulk(self, rows, page_size=PG_PAGE_SIZE):
+        """
+        Wstawia tweety (krotki: user_id, date, text, source_id, is_retweet); zwraca listę id.
+
+        Id są pobierane z sekwencji z góry, więc kolejność zwróconych id
+        odpowiada kolejności wierszy (RETURNING jej nie gwarantuje).
+        """
+        if not rows:
+            return []
+        self.cur.execute(NEXT_TWEET_IDS, (len(rows),))
+        ids = [r[0] for r in self.cur.fetchall()]
+        execute_values(
+            self.cur, INSERT_TWEETS_BULK,
+            [(tid, *row) for tid, row in zip(ids, rows)], page_size=page_size
+        )
+        return ids
+
+    def get_or_create_hashtags_bulk(self, tags, page_size=PG_PAGE_SIZE):
+        """Wstawia brakujące hashtagi i zwraca {tag: id} dla wszystkich podanych tagów."""
+        tags = {tag for tag in tags if tag}
+        self._warm_caches()
+        missing = [tag for tag in tags if tag not in self._hashtag_cache]
+        if missing:
+            execute_values(self.cur, INSERT_HASHTAGS_BULK, [(tag,) for tag in missing], page_size=page_size)
+            self.cur.execute(GET_HASHTAG_IDS, (missing,))
+            self._hashtag_cache.update((tag, hid) for hid, tag in self.cur.fetchall())
+        return {tag: self._hashtag_cache[tag] for tag in tags}
+
+    def link_tweet_hashtags_bulk(self, pairs, page_size=PG_PAGE_SIZE):
+        """Wstawia pary (tweet_id, hashtag_id) do tabeli łączącej."""
+        if pairs:
+            execute_values(self.cur, INSERT_TWEET_HASHTAGS_BULK, pairs, page_size=page_size)
+
+    @staticmethod
+    def _staging_frame(df):
+        """DataFrame w układzie STAGE_COLUMNS z typami kolumn staging (liczniki Int64, bool, lista tagów)."""
+        frame = df.reindex(columns=STAGE_COLUMNS)
+        for col in ["user_followers", "user_friends", "user_favourites"]:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").round().astype("Int64")
+        for col in ["user_verified", "is_retweet"]:
+            if frame[col].dtype != bool:
+                values = frame[col].astype("string").str.strip().str.lower()
+                frame[col] = values.isin(TRUTHY_VALUES).astype("boolean").mask(values.isna())
+        frame["hashtags"] = frame["hashtags"].map(_raw_tag_list)
+        return frame
+
+    @classmethod
+    def _staging_records(cls, df):
+        """Krotki w układzie STAGE_COLUMNS z natywnymi typami Pythona (None zamiast NaN/NaT/NA)."""
+        # Te same konwersje co COPY (_staging_frame), więc ścieżka INSERT ładuje identyczne dane
+        frame = cls._staging_frame(df)
+        for col in ["user_created", "date"]:
+            frame[col] = pd.to_datetime(frame[col], errors="coerce")
+        frame = frame.astype(object)
+        frame = frame.where(frame.notna(), None)
+        return frame.itertuples(index=False, name=None)
+
+    @classmethod
+    def _staging_csv(cls, df):
+        """Serializuje DataFrame do bufora CSV w układzie STAGE_COLUMNS (NULL jako \\N)."""
+        frame = cls._staging_frame(df)
+        frame["hashtags"] = frame["hashtags"].map(_pg_text_array)
+
+        buf = io.StringIO()
+        frame.to_csv(buf, index=False, header=False, na_rep="\\N")
+        buf.seek(0)
+        return buf
+
+    @_recover_on_error
+    def bulk_load_copy(self, df, build_indexes=True):
+        """
+        Ładuje DataFrame przez COPY FROM STDIN zamiast INSERT-ów per wiersz.
+
+        Wiersze trafiają jednym strumieniem do tymczasowej tabeli tweets_staging,
+        a users/sources/hashtags/tweets/tweet_hashtags są wypełniane z niej
+        pięcioma zapytaniami INSERT ... SELECT (ON CONFLICT jak w ścieżce per wiersz).
+
+        build_indexes=False zostawia tabele bez indeksów pomocniczych – przy ładowaniu
+        paczkami indeksy buduje raz init_indexes() po ostatniej paczce.
+        """
+        self.init_schema(with_indexes=False)
+
+        self.cur.execute(BULK_LOAD_SETTINGS)
+        # Bez indeksów pomocniczych w trakcie wstawiania – jedna budowa z posortowanego skanu na końcu
+        self.cur.execute(DROP_INDEXES)
+        self.cur.execute(CREATE_STAGE)
+        self.cur.copy_expert(COPY_STAGE, self._staging_csv(df))
+        for sql in (MERGE_STAGE_USERS, MERGE_STAGE_SOURCES, MERGE_STAGE_HASHTAGS,
+                    MERGE_STAGE_TWEETS, MERGE_STAGE_TWEET_HASHTAGS):
+            self.cur.execute(sql)
+        if build_indexes:
+            self.cur.execute(INDEX_DDL)
+            # Świeże statystyki dla planera przed zapytaniami testowymi
+            self.cur.execute(ANALYZE_TABLES)
+        self.commit()
+        return len(df)
 
     def commit(self):
+        self.flush_links()
         self.conn.commit()
 
+    @_recover_on_error
     def clear_database(self):
         """Wyczyść wszystkie tabele w bazie danych."""
         print("🧹 Czyszczenie bazy PostgreSQL...")
         start_time = time.perf_counter()
         
-        with self.conn.cursor() as cur:
-            cur.execute("DROP TABLE IF EXISTS tweet_hashtags CASCADE")
-            cur.execute("DROP TABLE IF EXISTS tweets CASCADE")
-            cur.execute("DROP TABLE IF EXISTS hashtags CASCADE")
-            cur.execute("DROP TABLE IF EXISTS sources CASCADE")
-            cur.execute("DROP TABLE IF EXISTS users CASCADE")
+        # Niewysłane powiązania dotyczą tweetów, które zaraz znikną
+        self._pending_links = []
+        self.cur.execute("DROP TABLE IF EXISTS tweet_hashtags CASCADE")
+        self.cur.execute("DROP TABLE IF EXISTS tweets CASCADE")
+        self.cur.execute("DROP TABLE IF EXISTS hashtags CASCADE")
+        self.cur.execute("DROP TABLE IF EXISTS sources CASCADE")
+        self.cur.execute("DROP TABLE IF EXISTS users CASCADE")
+        # Instrukcje przygotowane odwołują się do usuniętych tabel – przygotuje je ponownie init_schema
+        self.cur.execute("DEALLOCATE ALL")
+        self._prepared = False
         self.conn.commit()
+        # Zapamiętane id źródeł/hashtagów wskazują na usunięte wiersze
+        self._reset_caches()
         
         elapsed = time.perf_counter() - start_time
         print(f"✅ PostgreSQL wyczyszczone w {elapsed:.4f}s")
         return elapsed
 
-    def load_data_from_dataframe(self, df, batch_size=1000):
-        """Ładuje dane z DataFrame do PostgreSQL z pomiarem czasu."""
+    def load_data_from_dataframe(self, df):
+        """Ładuje dane z DataFrame do PostgreSQL z pomiarem czasu (COPY FROM STDIN)."""
         print(f"📥 Ładowanie {len(df):,} rekordów do PostgreSQL...")
         start_time = time.perf_counter()
         
-        # Inicjalizuj schemat
-        self.init_schema()
+        # Jeden strumień COPY + scalanie po stronie serwera zamiast kilku round-tripów na wiersz
+        total = self.bulk_load_copy(df)
+        
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ Załadowano {total:,} rekordów do PostgreSQL w {elapsed:.4f}s")
+        return elapsed
+
+    def _insert_batch(self, rows, page_size=PG_PAGE_SIZE):
+        """
+        Wstawia paczkę krotek helperami *_bulk: użytkownicy, źródła, tweety, hashtagi.
+
+        Krotki w układzie STAGE_COLUMNS z _staging_records (typy znormalizowane, braki jako None).
+        """
+        users, tweets, tag_lists = [], [], []
+        for (user_name, user_location, user_description, user_created, user_followers, user_friends,
+             user_favourites, user_verified, date, text, source, is_retweet, hashtags) in rows:
+            # Tweet bez autora trafia do bazy z user_id NULL – jak przy scalaniu ze staging (LEFT JOIN)
+            if user_name is not None:
+                users.append((user_name, user_location, user_description, user_created,
+                              user_followers, user_friends, user_favourites, _opt_bool(user_verified)))
+            tweets.append((user_name, date, text, source, _opt_bool(is_retweet)))
+            tag_lists.append(_as_tag_list(hashtags or []))
+
+        user_ids = self.upsert_users_bulk(users, page_size)
+        source_ids = self.get_or_create_sources_bulk((t[3] for t in tweets), page_size)
+        tweet_ids = self.insert_tweets_bulk([
+            (user_ids.get(user_name), date, text, source_ids.get(source), is_retweet)
+            for user_name, date, text, source, is_retweet in tweets
+        ], page_size)
+
+        hashtag_ids = self.get_or_create_hashtags_bulk((tag for tags in tag_lists for tag in tags), page_size)
+        self.link_tweet_hashtags_bulk(list({
+            (tweet_id, hashtag_ids[tag])
+            for tweet_id, tags in zip(tweet_ids, tag_lists)
+            for tag in tags
+        }), page_size)
+        return len(rows)
+
+    @_recover_on_error
+    def load_data_from_dataframe_inserts(self, df, batch_size=DEFAULT_BATCH_SIZE, build_indexes=True):
+        """
+        Ładuje dane z DataFrame do PostgreSQL wielowierszowymi INSERT-ami (ścieżka porównawcza).
+
+        batch_size to liczba wierszy zbieranych przed wysłaniem paczki do _insert_batch
+        (execute_values stronicuje ją dalej po PG_PAGE_SIZE); commit idzie co COMMIT_EVERY_ROWS.
+        build_indexes=False jak w bulk_load_copy: indeksy pomocnicze buduje później init_indexes().
+        """
+        print(f"📥 Ładowanie {len(df):,} rekordów do PostgreSQL (INSERT)...")
+        start_time = time.perf_counter()
+        
+        # Inicjalizuj schemat (bez indeksów pomocniczych – jak w bulk_load_copy powstają po załadowaniu)
+        # i wczytaj słowniki źródeł/hashtagów do cache
+        self.init_schema(with_indexes=False)
+        self._warm_caches()
         
         total = 0
-        for _, row in df.iterrows():
-            row_dict = row.to_dict()
-            
-            # Upsert user
-            user_id = self.upsert_user(row_dict)
-            
-            # Get or create source
-            source_id = self.get_or_create_source(row_dict.get("source"))
-            
-            # Insert tweet
-            tweet_id = self.insert_tweet(user_id, row_dict, source_id)
-            
-            # Process hashtags
-            hashtags = row_dict.get("hashtags") or []
-            if isinstance(hashtags, str):
-                try:
-                    import ast
-                    hashtags = ast.literal_eval(hashtags)
-                except:
-                    hashtags = []
-            
-            for tag in hashtags:
-                tag = str(tag).strip().lstrip("#").lower()
-                if tag:
-                    hashtag_id = self.get_or_create_hashtag(tag)
-                    self.link_tweet_hashtag(tweet_id, hashtag_id)
-            
-            total += 1
-            if total % batch_size == 0:
-                self.commit()
+        uncommitted = 0
+        # Jedna transakcja na COMMIT_EVERY_ROWS wierszy (nie na batch) z synchronous_commit = OFF
+        self.cur.execute(BULK_LOAD_SETTINGS)
+        # Krotki z natywnymi wartościami zamiast Series per wiersz (iterrows), znormalizowane jak dla COPY;
+        # wiersze są buforowane i wysyłane paczkami execute_values (jeden round-trip na tabelę i batch)
+        batch = []
+        for values in self._staging_records(df):
+            batch.append(values)
+            if len(batch) >= batch_size:
+                uncommitted += self._insert_batch(batch)
+                batch = []
+                if uncommitted >= COMMIT_EVERY_ROWS:
+                    self.commit()
+                    # SET LOCAL obowiązuje do końca transakcji – ponownie dla następnej
+                    self.cur.execute(BULK_LOAD_SETTINGS)
+                    total += uncommitted
+                    uncommitted = 0
+        if batch:
+            uncommitted += self._insert_batch(batch)
         
         # Final commit
         self.commit()
+        total += uncommitted
+        if build_indexes:
+            # Jedna budowa indeksów z gotowych danych (+ ANALYZE) zamiast aktualizacji przy każdym INSERT
+            self.init_indexes()
         
         elapsed = time.perf_counter() - start_time
         print(f"✅ Załadowano {total:,} rekordów do PostgreSQL w {elapsed:.4f}s")
         return elapsed
     
+    @_recover_on_error
     def test_read_count(self):
         """Test READ: Liczenie rekordów."""
         start = time.perf_counter()
-        with self.conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) FROM tweets")
-            count = cur.fetchone()[0]
+        self.cur.execute("SELECT COUNT(*) FROM tweets")
+        count = self.cur.fetchone()[0]
         elapsed = time.perf_counter() - start
         return {"time": elapsed, "count": count}
     
+    @_recover_on_error
     def test_read_recent(self, limit=100):
         """Test READ: Pobieranie najnowszych tweetów."""
         start = time.perf_counter()
-        with self.conn.cursor() as cur:
-            cur.execute("""
-                SELECT t.text, u.user_name, t.date 
-                FROM tweets t 
-                JOIN users u ON t.user_id = u.id 
-                ORDER BY t.date DESC 
-                LIMIT %s
-            """, (limit,))
-            results = cur.fetchall()
+        self.cur.execute("""
+            SELECT t.text, u.user_name, t.date 
+            FROM tweets t 
+            JOIN users u ON t.user_id = u.id 
+            ORDER BY t.date DESC 
+            LIMIT %s
+        """, (limit,))
+        results = self.cur.fetchall()
         elapsed = time.perf_counter() - start
         return {"time": elapsed, "count": len(results)}
     
+    @_recover_on_error
     def test_read_hashtag(self, hashtag="bitcoin", limit=50):
         """Test READ: Wyszukiwanie po hashtagach."""
         start = time.perf_counter()
-        with self.conn.cursor() as cur:
-            cur.execute("""
-                SELECT t.text, u.user_name, h.tag
-                FROM tweets t
-                JOIN users u ON t.user_id = u.id
-                JOIN tweet_hashtags th ON t.id = th.tweet_id
-                JOIN hashtags h ON th.hashtag_id = h.id
-                WHERE h.tag = %s
-                ORDER BY t.date DESC
-                LIMIT %s
-            """, (hashtag, limit))
-            results = cur.fetchall()
+        self.cur.execute("""
+            SELECT t.text, u.user_name, h.tag
+            FROM tweets t
+            JOIN users u ON t.user_id = u.id
+            JOIN tweet_hashtags th ON t.id = th.tweet_id
+            JOIN hashtags h ON th.hashtag_id = h.id
+            WHERE h.tag = %s
+            ORDER BY t.date DESC
+            LIMIT %s
+        """, (hashtag, limit))
+        results = self.cur.fetchall()
         elapsed = time.perf_counter() - start
         return {"time": elapsed, "count": len(results)}
     
-    def test_create(self, row_dict):
-        """Test CREATE: Wstawianie nowego rekordu."""
+    @_recover_on_error
+    def test_create(self, row_dict, commit=True):
+        """
+        Test CREATE: Wstawianie nowego rekordu.
+
+        commit=False mierzy samo wstawienie (pomiar przepustowości serii wstawień
+        z jednym commit() na końcu po stronie wywołującego).
+        """
         start = time.perf_counter()
         user_id = self.upsert_user(row_dict)
         source_id = self.get_or_create_source(row_dict.get("source"))
         tweet_id = self.insert_tweet(user_id, row_dict, source_id)
-        self.commit()
+        if commit:
+            self.commit()
         elapsed = time.perf_counter() - start
         return {"time": elapsed, "tweet_id": tweet_id}
     
+    @_recover_on_error
     def test_update(self, tweet_id=None):
         """Test UPDATE: Aktualizacja rekordu."""
         start = time.perf_counter()
-        with self.conn.cursor() as cur:
-            if tweet_id:
-                cur.execute("UPDATE tweets SET text = %s WHERE id = %s", 
-                           (f"Updated text {time.time()}", tweet_id))
-            else:
-                cur.execute("UPDATE tweets SET text = text || ' [UPDATED]' WHERE id = (SELECT id FROM tweets LIMIT 1)")
-            self.commit()
+        if tweet_id:
+            self.cur.execute("UPDATE tweets SET text = %s WHERE id = %s", 
+                       (f"Updated text {time.time()}", tweet_id))
+        else:
+            self.cur.execute("UPDATE tweets SET text = text || ' [UPDATED]' WHERE id = (SELECT id FROM tweets LIMIT 1)")
+        self.commit()
         elapsed = time.perf_counter() - start
         return {"time": elapsed}
     
+    @_recover_on_error
     def test_delete(self, tweet_id=None):
         """Test DELETE: Usuwanie rekordu."""
         start = time.perf_counter()
-        with self.conn.cursor() as cur:
-            if tweet_id:
-                cur.execute("DELETE FROM tweets WHERE id = %s", (tweet_id,))
-            else:
-                cur.execute("DELETE FROM tweets WHERE id = (SELECT id FROM tweets LIMIT 1)")
-            self.commit()
+        if tweet_id:
+            self.cur.execute("DELETE FROM tweets WHERE id = %s", (tweet_id,))
+        else:
+            self.cur.execute("DELETE FROM tweets WHERE id = (SELECT id FROM tweets LIMIT 1)")
+        self.commit()
         elapsed = time.perf_counter() - start
         return {"time": elapsed}
 
     def close(self):
+        self.cur.close()
         self.conn.close()
\ No newline at end of file
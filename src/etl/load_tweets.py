@@ -7,51 +7,163 @@ It handles various data type conversions including boolean parsing,
 list parsing, datetime conversion, and numeric type casting.
 """
 
-import ast 
+import os
+import re
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Union, Generator
+from typing import Any, Dict, List, Generator, Iterator
 
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:  # pyarrow is optional - fall back to the C parser
+    HAS_PYARROW = False
 
-def _parse_bool(x: Any) -> Optional[bool]:
+CSV_ENGINE = "pyarrow" if HAS_PYARROW else "c"
+
+# Columns of the Bitcoin tweets dataset used by the ETL and both databases
+TWEET_COLUMNS = [
+    "user_name", "user_location", "user_description", "user_created",
+    "user_followers", "user_friends", "user_favourites", "user_verified",
+    "date", "text", "hashtags", "source", "is_retweet"
+]
+
+# Type hints for load_csv: free-text columns skip inference and arrive as pandas
+# strings. Counts and flags are left to inference and normalized afterwards,
+# because malformed rows in the dataset would make a strict cast fail.
+TWEET_DTYPES = {
+    "user_name": "string",
+    "user_location": "string",
+    "user_description": "string",
+    "text": "string",
+    "hashtags": "string",
+    "source": "string",
+}
+DATE_COLUMNS = ["user_created", "date"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Hashtag token in a list cell ("['Bitcoin', '#BTC']" or "Bitcoin, #BTC"):
+# a run of word characters (Unicode letters, digits, "_"), so "#", brackets,
+# quotes and commas are skipped. Shared by every hashtag parser in the project.
+HASHTAG_PATTERN = re.compile(r"\w+")
+
+# Lower-cased string spellings of True (user_verified, is_retweet)
+_TRUE_STRINGS = frozenset({"true", "1", "yes", "y", "t"})
+
+# Rows per chunk when streaming the CSV in load_csv
+CSV_CHUNK_SIZE = 100_000
+
+
+def _read_options(path: str, **read_kwargs: Any) -> Dict[str, Any]:
     """
-    Parse a value to boolean, handling various string representations.
+    Build pd.read_csv options restricted to the TWEET_COLUMNS present in the file.
     
     Args:
-        x: Value to parse (can be bool, string, or NaN)
+        path: Path to the CSV file to read
+        **read_kwargs: Extra pd.read_csv options (e.g. dtype, parse_dates)
         
     Returns:
-        Boolean value if successfully parsed, None if input is NaN
+        Keyword arguments for pd.read_csv including usecols
+    """
+    # Header only - usecols and dtype must not reference columns missing from the file
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in TWEET_COLUMNS if c in header]
+    if "dtype" in read_kwargs:
+        read_kwargs["dtype"] = {c: t for c, t in read_kwargs["dtype"].items() if c in usecols}
+    if "parse_dates" in read_kwargs:
+        read_kwargs["parse_dates"] = [c for c in read_kwargs["parse_dates"] if c in usecols]
+    return {"usecols": usecols, **read_kwargs}
+
+
+def read_tweets_csv(path: str, **read_kwargs: Any) -> pd.DataFrame:
+    """
+    Read the tweets CSV, parsing only the columns listed in TWEET_COLUMNS.
+    
+    Uses the multithreaded PyArrow CSV reader when pyarrow is installed and
+    falls back to the C engine otherwise (or when Arrow's type inference
+    fails on a malformed file).
+    
+    Args:
+        path: Path to the CSV file to read
+        **read_kwargs: Extra pd.read_csv options (e.g. dtype, parse_dates)
         
-    Examples:
-        >>> _parse_bool("true")
-        True
-        >>> _parse_bool("1")
-        True
-        >>> _parse_bool("false")
-        False
-        >>> _parse_bool(None)
-        None
+    Returns:
+        DataFrame with the subset of TWEET_COLUMNS present in the file
     """
-    # Handle NaN values
-    if pd.isna(x): 
-        return None
+    options = _read_options(path, **read_kwargs)
     
-    # Return as-is if already boolean
-    if isinstance(x, bool): 
-        return x
+    if CSV_ENGINE == "pyarrow":
+        try:
+            return pd.read_csv(path, engine="pyarrow", **options)
+        except ValueError:
+            # ArrowInvalid (subclass of ValueError): column types inferred from
+            # the first block don't fit later rows
+            pass
+    return pd.read_csv(path, engine="c", low_memory=False, cache_dates=True, **options)
+
+
+def iter_tweets_csv(path: str, chunksize: int = CSV_CHUNK_SIZE, **read_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """
+    Stream the tweets CSV as DataFrames of at most ``chunksize`` rows.
+    
+    Only TWEET_COLUMNS are parsed, so peak memory is bounded by the chunk
+    size rather than the file. The C engine is used because the PyArrow
+    reader doesn't support chunksize.
+    
+    Args:
+        path: Path to the CSV file to read
+        chunksize: Number of CSV rows per DataFrame
+        **read_kwargs: Extra pd.read_csv options (e.g. dtype, parse_dates)
+        
+    Yields:
+        DataFrames with the subset of TWEET_COLUMNS present in the file
+    """
+    options = _read_options(path, **read_kwargs)
+    with pd.read_csv(path, engine="c", chunksize=chunksize, cache_dates=True, **options) as reader:
+        yield from reader
+
+
+def load_tweets(csv_path: str) -> pd.DataFrame:
+    """
+    Load the tweets dataset, caching the parsed CSV as a Parquet file.
+    
+    The first call parses the CSV and writes a Snappy-compressed Parquet file
+    next to it (``data/Bitcoin_tweets.csv`` -> ``data/Bitcoin_tweets.parquet``).
+    Later calls read the columnar cache instead of re-tokenizing the CSV.
+    The cache is rebuilt when the CSV is newer than the Parquet file.
+    
+    Args:
+        csv_path: Path to the source CSV file
+        
+    Returns:
+        DataFrame with the subset of TWEET_COLUMNS present in the file
+        
+    Note:
+        Without pyarrow the cache is disabled and the CSV is always parsed.
+    """
+    if not HAS_PYARROW:
+        return read_tweets_csv(csv_path)
     
-    # Convert to string and normalize for comparison
-    s = str(x).strip().lower()
-    return s in ('true', '1', 'yes', 'y', 't')
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return pd.read_parquet(parquet_path)
+    
+    df = read_tweets_csv(csv_path)
+    try:
+        df.to_parquet(parquet_path, compression="snappy", index=False)
+    except (ValueError, TypeError) as e:
+        # Mixed-type object columns can't be mapped to an Arrow schema;
+        # keep working from the CSV frame without a cache
+        print(f"⚠️  Nie udało się zapisać cache Parquet ({parquet_path}): {e}")
+    return df
 
 
 def _parse_list(x: Any) -> List[str]:
     """
     Parse a value to a list of strings, handling various input formats.
     
-    Attempts to parse the input as a Python literal list first,
-    then falls back to comma-separated string parsing.
+    Extracts hashtag tokens from a Python list literal or a
+    comma-separated string, dropping any '#' prefix.
     
     Args:
         x: Value to parse (can be list, string, or NaN)
@@ -75,73 +187,58 @@ def _parse_list(x: Any) -> List[str]:
     if isinstance(x, list):
         return x
     
-    s = str(x)
-    
-    # Try to parse as Python literal (e.g., "['a', 'b']")
-    try:
-        lst = ast.literal_eval(s)
-        if isinstance(lst, list):
-            # Clean hashtags by removing '#' prefix and whitespace
-            return [str(t).strip().lstrip('#') for t in lst if str(t).strip()]
-    except (ValueError, SyntaxError):
-        # If literal_eval fails, fall back to string parsing
-        pass
-    
-    # Parse comma-separated string
-    # Remove brackets if present and split by comma
-    s = s.strip().strip('[]')
-    tokens = [t.strip().lstrip("#").strip("'\"") for t in s.split(",") if t.strip()]
-    return tokens
-
-
-def normalize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    # Hashtags consist of word characters only, so one regex scan extracts
+    # them from both list literals and comma-separated strings
+    # (no ast.literal_eval, which runs the full Python parser per value)
+    return HASHTAG_PATTERN.findall(str(x))
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Normalize a single row of Twitter data to proper data types.
+    Normalize Twitter data types column by column.
     
-    Converts numeric fields to integers, parses boolean fields,
-    converts date fields to datetime objects, and processes hashtags.
+    Vectorized replacement for per-row normalization: each conversion runs
+    once over a whole column instead of once per record.
     
     Args:
-        row: Dictionary representing a single tweet record
+        df: DataFrame containing all expected columns
         
     Returns:
-        Dictionary with normalized data types
-        
-    Note:
-        This function modifies the input dictionary in-place and also returns it.
+        DataFrame with nullable integer counts, nullable boolean user_verified,
+        datetime columns and hashtags parsed into lists
     """
-    # Convert numeric fields to integers, handling NaN values
-    row["user_followers"] = None if pd.isna(row.get("user_followers")) else int(float(row["user_followers"]))
-    row["user_friends"] = None if pd.isna(row.get("user_friends")) else int(row["user_friends"])
-    row["user_favourites"] = None if pd.isna(row.get("user_favourites")) else int(row["user_favourites"])
+    # Numeric fields: invalid values become NA, fractional values are truncated
+    for col in ("user_followers", "user_friends", "user_favourites"):
+        values = pd.to_numeric(df[col], errors="coerce")
+        df[col] = np.trunc(values).astype("Int64")
     
-    # Parse boolean field
-    row["user_verified"] = _parse_bool(row.get("user_verified"))
-
-    # Convert date fields to datetime objects
+    # Boolean field: NA stays missing, strings are matched case-insensitively
+    verified = df["user_verified"]
+    if verified.dtype != bool:
+        normalized = verified.astype("string").str.strip().str.lower()
+        df["user_verified"] = normalized.isin(_TRUE_STRINGS).astype("boolean").mask(verified.isna())
+    
+    # Date fields: one parser run per column instead of per value
     for col in ("user_created", "date"):
-        v = row.get(col)
-        if pd.isna(v):
-            row[col] = None
-        else:
-            # Use pandas to_datetime with error coercion for robust parsing
-            row[col] = pd.to_datetime(v, errors="coerce", utc=False)
+        df[col] = pd.to_datetime(df[col], errors="coerce", utc=False)
     
-    # Parse hashtags list
-    row["hashtags"] = _parse_list(row.get("hashtags"))
+    # Hashtags list
+    df["hashtags"] = df["hashtags"].map(_parse_list)
     
-    return row
+    return df
 
 
-def load_csv(path: str) -> Generator[Dict[str, Any], None, None]:
+def load_csv(path: str, chunksize: int = CSV_CHUNK_SIZE) -> Generator[Dict[str, Any], None, None]:
     """
     Load and normalize Twitter data from a CSV file.
     
-    Reads a CSV file, ensures all expected columns are present,
-    fills missing values with defaults, and normalizes each row.
+    Reads the CSV in chunks, reindexes each chunk to TWEET_COLUMNS,
+    fills missing flag values with False, and normalizes the columns of each
+    chunk, so peak memory is bounded by the chunk size rather than the file.
     
     Args:
         path: Path to the CSV file to load
+        chunksize: Number of CSV rows parsed and normalized at a time
         
     Returns:
         Generator yielding normalized tweet records as dictionaries
@@ -154,25 +251,23 @@ def load_csv(path: str) -> Generator[Dict[str, Any], None, None]:
         >>> for tweet in load_csv("tweets.csv"):
         ...     print(tweet["text"])
     """
-    # Load CSV file into pandas DataFrame
-    df = pd.read_csv(path)
-    
-    # Define expected columns for Twitter data
-    expected_columns = [
-        "user_name", "user_location", "user_description", "user_created",
-        "user_followers", "user_friends", "user_favourites", "user_verified",
-        "date", "text", "hashtags", "source", "is_retweet"
-    ]
-    
-    # Add missing columns with None values
-    for col in expected_columns:
-        if col not in df.columns:
-            df[col] = None
-    
-    # Fill specific columns with default values for missing data
-    df = df.fillna({"user_verified": False, "is_retweet": False})
-    
-    # Convert DataFrame to records and normalize each row
-    # Using generator for memory efficiency with large datasets
-    rows = (normalize_row(rec) for rec in df.to_dict("records"))
-    return rows
+    # Load only the expected columns, with text types and the date format given
+    # up front (values not matching DATE_FORMAT are re-parsed in _normalize_frame)
+    chunks = iter_tweets_csv(path, chunksize, dtype=TWEET_DTYPES, parse_dates=DATE_COLUMNS, date_format=DATE_FORMAT)
+    for df in chunks:
+        # One reindex adds any missing columns (as NaN) in TWEET_COLUMNS order,
+        # then the flag columns get their False default for missing data
+        # (no silent downcast inside fillna - infer_objects picks the dtype explicitly)
+        with pd.option_context("future.no_silent_downcasting", True):
+            df = df.reindex(columns=TWEET_COLUMNS).assign(
+                user_verified=lambda d: d["user_verified"].fillna(False).infer_objects(copy=False),
+                is_retweet=lambda d: d["is_retweet"].fillna(False).infer_objects(copy=False),
+            )
+        
+        # Normalize whole columns, then hand out rows with missing values as None
+        df = _normalize_frame(df).astype(object)
+        df = df.where(df.notna(), None)
+        
+        columns = list(df.columns)
+        for values in df.itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
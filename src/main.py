@@ -1,138 +1,297 @@
+import asyncio
 import time
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+
+try:
+    import duckdb
+except ImportError:  # duckdb jest opcjonalny – analiza CSV wraca wtedy do pandas
+    duckdb = None
 
 from src.config import *
 from src.db.postgres_manager import PostgresManager
+from src.db.async_postgres_manager import AsyncPostgresManager
 from src.db.mongo_manager import MongoManager
-from src.etl.load_tweets import load_csv
-
-from pymongo import InsertOne
+from src.etl.load_tweets import (
+    CSV_CHUNK_SIZE, DATE_COLUMNS, DATE_FORMAT, HASHTAG_PATTERN, TWEET_COLUMNS, iter_tweets_csv,
+)
 
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1000"))
+# Co ile batchy Mongo wypisywany jest postęp (przy BATCH_SIZE=1000 – co 100k rekordów)
+PROGRESS_EVERY = 100
 
-def build_mongo_doc(row: Dict[str, Any]) -> Dict[str, Any]:
-    """Buduje dokument dla jednej KOLEKCJI 'tweets' (zagnieżdżony user)."""
-    hashtags = row.get("hashtags") or []
-    hashtags = [str(h).strip().lstrip("#").lower() for h in hashtags if str(h).strip()]
-    doc = {
-        "user": {
-            "user_name": row.get("user_name"),
-            "user_location": row.get("user_location"),
-            "user_description": row.get("user_description"),
-            "user_created": row.get("user_created"),
-            "user_followers": row.get("user_followers"),
-            "user_friends": row.get("user_friends"),
-            "user_favourites": row.get("user_favourites"),
-            "user_verified": bool(row.get("user_verified")) if row.get("user_verified") is not None else False,
-        },
-        "date": row.get("date"),
-        "text": row.get("text"),
-        "hashtags": hashtags,
-        "source": row.get("source") or None,
-        "is_retweet": bool(row.get("is_retweet")) if row.get("is_retweet") is not None else False,
-    }
-    return doc
+def parse_hashtags(value: str) -> tuple:
+    """Konwerter read_csv: "['Bitcoin', '#BTC']" → ("bitcoin", "btc"); pusta komórka → ()."""
+    # Krotka, nie lista – wiersze zostają hashowalne dla drop_duplicates w clean_csv_data
+    return tuple(HASHTAG_PATTERN.findall(value.lower()))
+
+# Kolumny identyfikujące tweet przy usuwaniu duplikatów w clean_csv_data
+DEDUP_COLUMNS = ["user_name", "date", "text"]
+
+USER_COLUMNS = [
+    "user_name", "user_location", "user_description", "user_created",
+    "user_followers", "user_friends", "user_favourites",
+]
+
+def build_mongo_docs(df) -> List[RawBSONDocument]:
+    """Buduje dokumenty dla jednej KOLEKCJI 'tweets' (zagnieżdżony user) z całego DataFrame, od razu jako BSON."""
+    # Transformacje liczone raz na kolumnę, a nie w Pythonie per wiersz; reindex = brakująca kolumna → NaN
+    df = df.reindex(columns=USER_COLUMNS + ["user_verified", "date", "text", "hashtags", "source", "is_retweet"])
+    # to_dict('records') zwraca natywne typy Pythona (BSON nie koduje skalarów numpy)
+    users = df[USER_COLUMNS].to_dict("records")
+    # Daty są już datetime64 (Timestamp to datetime – natywny typ BSON); tylko NaT musi stać się None
+    created = df["user_created"].astype(object).where(df["user_created"].notna(), None).tolist()
+    verified = df["user_verified"].fillna(False).astype(bool).tolist()
+    for user, user_created, is_verified in zip(users, created, verified):
+        user["user_created"] = user_created
+        user["user_verified"] = is_verified
+    # Hashtagi są już znormalizowane przy wczytaniu (parse_hashtags: krotka tagów bez "#", małymi literami)
+    hashtags = [list(h) if isinstance(h, (list, tuple)) else [] for h in df["hashtags"].tolist()]
+    sources = [s or None for s in df["source"].tolist()]
+    retweets = df["is_retweet"].fillna(False).astype(bool).tolist()
+
+    # Każdy dokument kodowany do BSON raz, tutaj; insert_many wysyła gotowe bajty RawBSONDocument
+    # bez ponownego przechodzenia po słowniku (i bez dopisywania _id – nada je serwer)
+    return [
+        RawBSONDocument(encode({"user": u, "date": d, "text": t, "hashtags": h, "source": s, "is_retweet": r}))
+        for u, d, t, h, s, r in zip(users, df["date"].tolist(), df["text"].tolist(), hashtags, sources, retweets)
+    ]
+
+def flush_mongo(mg: MongoManager, docs: List[RawBSONDocument]) -> int:
+    """Wysyła zebrane dokumenty do Mongo jednym `insert_many` (bez wrapperów InsertOne)."""
+    if not docs:
+        return 0
+    # load_col: write concern w=1, j=False na czas ładowania
+    mg.load_col.insert_many(docs, ordered=False, bypass_document_validation=True)
+    # Dla RawBSONDocument inserted_ids jest puste (_id nadaje serwer); błąd zapisu zgłasza
+    # BulkWriteError, więc po powrocie wszystkie dokumenty są zapisane
+    return len(docs)
 
-def flush_postgres(pg: PostgresManager):
-    """Commit dla Postgresa (dla spójności logów)."""
-    pg.commit()
+async def load_postgres_async(df) -> int:
+    """Ładuje DataFrame przez asyncpg (binarny COPY, słowniki scalane równolegle); zwraca liczbę wierszy."""
+    # Pula asyncpg jest związana z pętlą zdarzeń, więc żyje tyle co jedno asyncio.run() na paczkę
+    async with AsyncPostgresManager(PG_HOST, PG_PORT, PG_DB, PG_USER, PG_PASS) as apg:
+        return await apg.bulk_load(df, build_indexes=False)
 
-def flush_mongo(mg: MongoManager, ops: List[InsertOne]) -> int:
-    """Wysyła zebrane operacje do Mongo w jednym `bulk_write`."""
-    if not ops:
+def load_postgres(pg: PostgresManager, df) -> int:
+    """Ładuje DataFrame do PostgreSQL (model relacyjny); zwraca liczbę wierszy."""
+    if PG_LOAD_METHOD == "async":
+        pg_total = asyncio.run(load_postgres_async(df))
+        print(f"✅ PostgreSQL: zapisano {pg_total} rekordów (asyncpg COPY).")
+        return pg_total
+    if PG_LOAD_METHOD == "insert":
+        # Ścieżka porównawcza: wielowierszowe INSERT ... VALUES (execute_values) po BATCH_SIZE wierszy
+        pg.load_data_from_dataframe_inserts(df, batch_size=BATCH_SIZE, build_indexes=False)
+        return len(df)
+    # Cały DataFrame jednym COPY FROM STDIN do tabeli staging, potem users/sources/hashtags/
+    # tweets/tweet_hashtags wypełniane zapytaniami INSERT ... SELECT – bez round-tripów per wiersz
+    pg_total = pg.bulk_load_copy(df, build_indexes=False)
+    print(f"✅ PostgreSQL: zapisano {pg_total} rekordów (COPY).")
+    return pg_total
+
+def load_mongo(mg: MongoManager, df) -> int:
+    """Ładuje DataFrame do MongoDB (1 kolekcja: 'tweets') batchami po BATCH_SIZE; zwraca liczbę wierszy."""
+    # Dokumenty budowane kolumnami dla całej paczki, wysyłane kawałkami po BATCH_SIZE
+    mongo_docs = build_mongo_docs(df)
+    total = 0
+
+    # Batche liczone po cichu – print (syscall) tylko co PROGRESS_EVERY batchy i na końcu paczki
+    for batch_no, start in enumerate(range(0, len(mongo_docs), BATCH_SIZE), 1):
+        total += flush_mongo(mg, mongo_docs[start:start + BATCH_SIZE])
+        if batch_no % PROGRESS_EVERY == 0:
+            print(f"  … Mongo: batch {batch_no}, zapisano {total:,} rekordów")
+    print(f"✅ MongoDB: zapisano {total} rekordów (insert_many po {BATCH_SIZE}).")
+    return total
+
+def wait_for_loads(pending) -> int:
+    """Czeka na ładowanie paczki [mongo, postgres]; zwraca liczbę rekordów (result() przekazuje wyjątki)."""
+    if not pending:
         return 0
-    res = mg.col.bulk_write(ops, ordered=False)
-    return res.inserted_count
+    mongo_future, pg_future = pending
+    total = mongo_future.result()
+    pg_future.result()
+    return total
+
+# Ile wierszy z początku pliku czytać, by znaleźć przykładowe wartości kolumn
+SAMPLE_ROWS = 1000
 
-def analyze_csv_data(csv_path: str):
-    """Przeanalizuj dane CSV i wyświetl statystyki."""
+def _csv_stats_duckdb(csv_path: str):
+    """Liczba wierszy, braki i (przybliżone) unikalne wartości kolumn CSV jednym zapytaniem DuckDB."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    columns = [c for c in TWEET_COLUMNS if c in header]
+    # DuckDB czyta plik sam (równolegle, kolumnowo) – bez budowania DataFrame; all_varchar pomija
+    # zgadywanie typów, a approx_count_distinct (HyperLogLog) wystarcza do raportu
+    aggregates = ", ".join(
+        f'COUNT(*) - COUNT("{c}") AS "null_{c}", approx_count_distinct("{c}") AS "uniq_{c}"' for c in columns
+    )
+    row = duckdb.sql(
+        f"SELECT COUNT(*) AS n, {aggregates} FROM read_csv($path, header = true, all_varchar = true)",
+        params={"path": csv_path},
+    ).fetchone()
+    null_counts = pd.Series(row[1::2], index=columns)
+    unique_counts = dict(zip(columns, row[2::2]))
+    return row[0], columns, null_counts, unique_counts
+
+def analyze_csv_data(csv_path: str, chunksize: int = CSV_CHUNK_SIZE) -> Dict[str, Any]:
+    """Przeanalizuj dane CSV i wyświetl statystyki (strumieniowo, paczkami po chunksize wierszy)."""
     print(f"📊 Analiza danych z pliku: {csv_path}")
     
-    import pandas as pd
-    
-    # Wczytaj dane do pandas DataFrame
-    df = pd.read_csv(csv_path)
-    
+    if duckdb is not None:
+        try:
+            total_rows, columns, null_counts, unique_counts = _csv_stats_duckdb(csv_path)
+        except duckdb.Error as e:
+            # Np. wiersze wieloliniowe/uszkodzone, których sniffer DuckDB nie przyjmuje – wtedy pandas
+            print(f"⚠️  Analiza w DuckDB nie powiodła się ({e}) – używam pandas")
+        else:
+            # Przykładowe wartości dla pierwszych 5 kolumn z początku pliku (bez parsowania całej paczki)
+            head = pd.read_csv(csv_path, usecols=columns[:5], nrows=SAMPLE_ROWS)
+            samples = {col: head[col].dropna().head(3).tolist() for col in columns[:5]}
+            return _print_csv_stats(csv_path, total_rows, columns, null_counts, unique_counts, samples)
+    
+    # Plik czytany paczkami – w pamięci tylko bieżąca paczka i liczniki, nie cała ramka
+    total_rows = 0
+    columns: List[str] = []
+    null_counts = None
+    unique_hashes: Dict[str, List[np.ndarray]] = {}
+    samples: Dict[str, List[Any]] = {}
+    for chunk in iter_tweets_csv(csv_path, chunksize):
+        if null_counts is None:
+            columns = chunk.columns.tolist()
+            null_counts = chunk.isnull().sum()
+            unique_hashes = {col: [] for col in columns}
+            samples = {col: [] for col in columns[:5]}
+        else:
+            null_counts += chunk.isnull().sum()
+        total_rows += len(chunk)
+        for col in columns:
+            # Unikalne wartości jako 64-bitowe skróty (bez trzymania samych stringów)
+            values = chunk[col].dropna()
+            unique_hashes[col].append(pd.util.hash_pandas_object(values, index=False).unique())
+            # Przykładowe wartości dla pierwszych 5 kolumn
+            if col in samples and len(samples[col]) < 3:
+                samples[col] += values.head(3 - len(samples[col])).tolist()
+    
+    unique_counts = {col: len(np.unique(np.concatenate(unique_hashes[col]))) for col in columns}
+    return _print_csv_stats(csv_path, total_rows, columns, null_counts, unique_counts, samples)
+
+def _print_csv_stats(csv_path, total_rows, columns, null_counts, unique_counts, samples) -> Dict[str, Any]:
+    """Wyświetla statystyki z analyze_csv_data i zwraca je jako słownik."""
     print(f"\n📈 Podstawowe statystyki:")
-    print(f"  Liczba rekordów: {len(df):,}")
-    print(f"  Liczba kolumn: {len(df.columns)}")
+    print(f"  Liczba rekordów: {total_rows:,}")
+    print(f"  Liczba kolumn: {len(columns)}")
     print(f"  Rozmiar pliku: {os.path.getsize(csv_path) / (1024*1024):.1f} MB")
     
     print(f"\n🔍 Analiza kolumn:")
-    for col in df.columns:
-        null_count = df[col].isnull().sum()
-        null_pct = (null_count / len(df)) * 100
-        unique_count = df[col].nunique()
+    for col in columns:
+        null_count = int(null_counts[col])
+        null_pct = (null_count / total_rows) * 100 if total_rows else 0.0
+        unique_count = unique_counts[col]
         
         print(f"  {col}:")
         print(f"    Brakujące wartości: {null_count:,} ({null_pct:.1f}%)")
         print(f"    Unikalne wartości: {unique_count:,}")
         
-        # Pokaż przykładowe wartości dla pierwszych 5 kolumn
-        if col in df.columns[:5]:
-            sample_values = df[col].dropna().head(3).tolist()
-            print(f"    Przykłady: {sample_values}")
-    
-    return df
+        if col in samples:
+            print(f"    Przykłady: {samples[col]}")
+    
+    return {
+        "total_records": total_rows,
+        "columns": columns,
+        "null_counts": null_counts,
+        "unique_counts": unique_counts,
+    }
+
+
+class SeenHashes:
+    """Skróty (uint64) tweetów z wcześniejszych paczek CSV – dedup w clean_csv_data obejmuje cały plik."""
 
+    def __init__(self):
+        # Posortowana tablica zamiast set: 8 bajtów na tweet zamiast obiektu int w tablicy haszującej
+        self.hashes = np.empty(0, dtype=np.uint64)
 
-def clean_csv_data(df):
-    """Wyczyść i przygotuj dane CSV."""
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Maska: które skróty już wystąpiły (wyszukiwanie binarne w posortowanej tablicy)."""
+        idx = np.searchsorted(self.hashes, hashes)
+        found = np.zeros(len(hashes), dtype=bool)
+        inside = idx < len(self.hashes)
+        found[inside] = self.hashes[idx[inside]] == hashes[inside]
+        return found
+
+    def add(self, hashes: np.ndarray):
+        # Dwa posortowane ciągi – sortowanie stabilne (timsort) scala je w czasie liniowym
+        self.hashes = np.sort(np.concatenate([self.hashes, np.sort(hashes)]), kind="stable")
+
+
+def clean_csv_data(df, seen_hashes: Optional[SeenHashes] = None):
+    """
+    Wyczyść i przygotuj dane CSV.
+
+    seen_hashes (przy czytaniu paczkami) zbiera skróty tweetów z kolejnych paczek, więc duplikat
+    z innej paczki jest usuwany tak samo jak przy czyszczeniu całego pliku naraz.
+    """
     print(f"\n🧹 Czyszczenie danych...")
     
     original_count = len(df)
     
-    # 1. Usuń duplikaty
-    df_cleaned = df.drop_duplicates()
+    # Daty parsowane raz, tutaj, ze stałym formatem (bez zgadywania formatu per wartość) do datetime64;
+    # read_csv zostawia kolumnę jako tekst, gdy choć jedna wartość nie pasuje – wtedy NaT dla złych
+    # wartości. Dalej dedup, walidacja, COPY i BSON dostają gotowe daty zamiast ponownego parsowania
+    # stringów (a skrót daty jest ten sam niezależnie od tego, jak kolumnę sparsował read_csv)
+    df = df.assign(**{
+        col: pd.to_datetime(df[col], format=DATE_FORMAT, errors='coerce', cache=True)
+        for col in DATE_COLUMNS
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col])
+    })
+    
+    # 1. Usuń duplikaty – tweet identyfikują user_name + date + text, więc zamiast porównywać całe
+    #    wiersze (długie opisy, krotki hashtagów) dedup idzie po jednym 64-bitowym skrócie tych kolumn;
+    #    z seen_hashes także względem wcześniejszych paczek pliku
+    key_columns = [c for c in DEDUP_COLUMNS if c in df.columns]
+    row_hash = pd.util.hash_pandas_object(df[key_columns], index=False).to_numpy()
+    keep = ~pd.Series(row_hash).duplicated().to_numpy()
+    if seen_hashes is not None:
+        keep &= ~seen_hashes.contains(row_hash)
+        seen_hashes.add(row_hash[keep])
+    df_cleaned = df.loc[keep].copy()
     duplicates_removed = original_count - len(df_cleaned)
     print(f"  Usunięto duplikatów: {duplicates_removed:,}")
     
-    # 2. Sprawdź i wyczyść kolumny tekstowe
-    text_columns = ['user_name', 'user_location', 'user_description', 'text']
+    # 2-5. Kolumny tekstowe (w tym user_name i text) niepuste, date prawidłowa
+    #    Jedna wspólna maska zamiast filtrowania (i kopiowania) ramki osobno dla każdego warunku;
+    #    "\S" sprawdza niepustość bez alokowania przyciętych kopii stringów, a strip
+    #    idzie dopiero po filtrowaniu – tylko po wierszach, które zostają
+    text_columns = [c for c in ['user_name', 'user_location', 'user_description', 'text'] if c in df_cleaned.columns]
+    conditions = [df_cleaned['date'].notna().to_numpy(dtype=bool)]
+    conditions += [
+        df_cleaned[c].fillna('').str.contains(r'\S', regex=True).to_numpy(dtype=bool)
+        for c in text_columns
+    ]
+    mask = np.logical_and.reduce(conditions)
+    df_cleaned = df_cleaned.loc[mask].copy()
     for col in text_columns:
-        if col in df_cleaned.columns:
-            # Usuń rekordy z pustymi stringami
-            df_cleaned = df_cleaned[df_cleaned[col].fillna('').str.strip() != '']
-            print(f"  Wyczyściono kolumnę {col}")
-    
-    # 3. Sprawdź user_name - musi być unikalny i niepusty
-    df_cleaned = df_cleaned.dropna(subset=['user_name'])
-    df_cleaned = df_cleaned[df_cleaned['user_name'].str.strip() != '']
-    
-    # 4. Sprawdź date - musi być prawidłowa data
-    df_cleaned = df_cleaned.dropna(subset=['date'])
-    
-    # 5. Sprawdź text - musi być niepusty
-    df_cleaned = df_cleaned.dropna(subset=['text'])
-    df_cleaned = df_cleaned[df_cleaned['text'].str.strip() != '']
-    
-    # 6. Wyczyść hashtags - usuń puste listy i nieprawidłowe formaty
-    if 'hashtags' in df_cleaned.columns:
-        # Zastąp NaN pustymi listami
-        df_cleaned['hashtags'] = df_cleaned['hashtags'].fillna('[]')
-        # Usuń rekordy z pustymi listami hashtagów (opcjonalnie)
-        # df_cleaned = df_cleaned[df_cleaned['hashtags'] != '[]']
-    
-    # 7. Wyczyść kolumny numeryczne
-    numeric_columns = ['user_followers', 'user_friends', 'user_favourites']
-    for col in numeric_columns:
-        if col in df_cleaned.columns:
-            # Zastąp ujemne wartości 0
-            df_cleaned[col] = df_cleaned[col].clip(lower=0)
-            # Zastąp NaN 0
-            df_cleaned[col] = df_cleaned[col].fillna(0)
-    
-    # 8. Wyczyść kolumny boolean
-    boolean_columns = ['user_verified', 'is_retweet']
-    for col in boolean_columns:
-        if col in df_cleaned.columns:
-            # Zastąp NaN False
-            df_cleaned[col] = df_cleaned[col].fillna(False)
-    
-    # 9. Wyczyść source
-    if 'source' in df_cleaned.columns:
-        df_cleaned['source'] = df_cleaned['source'].fillna('Unknown')
+        df_cleaned[col] = df_cleaned[col].str.strip()
+        print(f"  Wyczyściono kolumnę {col}")
+    
+    # 6. Hashtagi przychodzą już sparsowane z read_csv (konwerter parse_hashtags) – bez kroku tutaj
+    
+    # 7-9. Pozostałe kolumny – numeryczne: ujemne i NaN → 0 (jeden blok dla wszystkich kolumn)
+    numeric_columns = [c for c in ['user_followers', 'user_friends', 'user_favourites'] if c in df_cleaned.columns]
+    df_cleaned[numeric_columns] = df_cleaned[numeric_columns].clip(lower=0).fillna(0)
+    
+    #    Pozostałe braki jednym fillna: boolean → False, source → 'Unknown'
+    #    (bez cichego rzutowania w fillna – typ kolumn wybiera jawnie infer_objects)
+    with pd.option_context("future.no_silent_downcasting", True):
+        df_cleaned = df_cleaned.fillna({
+            'user_verified': False,
+            'is_retweet': False,
+            'source': 'Unknown',
+        }).infer_objects(copy=False)
     
     final_count = len(df_cleaned)
     removed_count = original_count - final_count
@@ -148,8 +307,6 @@ def validate_data_quality(df):
     """Sprawdź jakość danych po czyszczeniu."""
     print(f"\n✅ Walidacja jakości danych:")
     
-    import pandas as pd
-    
     issues = []
     
     # Sprawdź czy user_name jest unikalny
@@ -166,11 +323,10 @@ def validate_data_quality(df):
         else:
             print(f"  ✅ {col} nie zawiera pustych wartości")
     
-    # Sprawdź czy daty są prawidłowe
-    try:
-        pd.to_datetime(df['date'], errors='raise')
+    # Sprawdź czy daty są prawidłowe – clean_csv_data zostawia już datetime64, więc bez ponownego parsowania
+    if pd.api.types.is_datetime64_any_dtype(df['date']) and df['date'].notna().all():
         print("  ✅ Daty są prawidłowe")
-    except:
+    else:
         issues.append("Nieprawidłowe daty")
     
     # Sprawdź czy kolumny numeryczne są nieujemne
@@ -230,7 +386,13 @@ def run_basic_benchmarks(pg: PostgresManager, mg: MongoManager):
     # MongoDB
     start = time.perf_counter()
     mongo_tweet_count = mg.col.count_documents({})
-    mongo_user_count = len(mg.col.distinct("user.user_name"))
+    # Liczba unikalnych użytkowników liczona po stronie serwera – do klienta trafia jeden skalar,
+    # a nie lista wszystkich nazw; hint na indeks user.user_name (z init_indexes)
+    mongo_user_count = next(mg.col.aggregate(
+        [{"$group": {"_id": "$user.user_name"}}, {"$count": "n"}],
+        hint="user.user_name_1",
+        allowDiskUse=True,
+    ), {"n": 0})["n"]
     mongo_time = time.perf_counter() - start
     
     print(f"  PostgreSQL: {pg_tweet_count} tweetów, {pg_user_count} użytkowników w {pg_time:.4f}s")
@@ -304,59 +466,54 @@ def run():
     # Wyczyść bazy danych
     clear_databases(pg, mg)
 
-    print("🧱 Inicjalizacja schematu / indeksów...")
-    pg.init_schema()
-    mg.init_indexes()  # indeksy: date, user.user_name, hashtags, is_retweet
+    # Same tabele – indeksy pomocnicze powstają dopiero po załadowaniu danych
+    print("🧱 Inicjalizacja schematu...")
+    pg.init_schema(unlogged=PG_UNLOGGED, with_indexes=False)
 
-    # Analiza i czyszczenie danych CSV
+    # Analiza danych CSV (strumieniowo – tylko liczniki, bez trzymania ramki w pamięci)
     print(f"\n📊 Analiza i czyszczenie danych CSV...")
-    df_raw = analyze_csv_data(CSV_PATH)
-    df_cleaned = clean_csv_data(df_raw)
-    data_quality_ok = validate_data_quality(df_cleaned)
-    
-    if not data_quality_ok:
-        print("⚠️  Dane zawierają problemy jakościowe. Kontynuujesz? (Enter aby kontynuować)")
-        input()
+    analyze_csv_data(CSV_PATH)
     
     print(f"\n📥 Wczytywanie wyczyszczonych danych...")
-    # Konwertuj DataFrame z powrotem na generator
-    rows_iter = (row.to_dict() for _, row in df_cleaned.iterrows())
-
-    mongo_ops: List[InsertOne] = []
-    total = 0
     t0 = time.perf_counter()
+    total = 0
+    quality_confirmed = False
+
+    # Plik czytany paczkami: każda paczka jest czyszczona, ładowana i zwalniana, więc zużycie pamięci
+    # nie zależy od rozmiaru pliku. PostgreSQL (COPY) i MongoDB (insert_many) ładują paczkę równolegle
+    # w dwóch wątkach – oba czekają głównie na sieć/serwer, więc ich opóźnienia się nakładają –
+    # a wątek główny w tym czasie wczytuje i czyści następną paczkę. Każdy wątek ma własne połączenie
+    # (pg.conn i klient Mongo), a kolejna paczka trafia do nich dopiero po zakończeniu poprzedniej
+    # Hashtagi parsowane raz, już przy czytaniu CSV – dalej kolumna krotek bez ponownego parsowania
+    chunks = iter_tweets_csv(
+        CSV_PATH, CSV_CHUNK_SIZE,
+        parse_dates=DATE_COLUMNS, date_format=DATE_FORMAT, converters={"hashtags": parse_hashtags},
+    )
+    pending = []
+    # Duplikaty usuwane w całym pliku, nie tylko w obrębie paczki
+    seen_hashes = SeenHashes()
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        for chunk in chunks:
+            df_cleaned = clean_csv_data(chunk, seen_hashes)
+            if not validate_data_quality(df_cleaned) and not quality_confirmed:
+                print("⚠️  Dane zawierają problemy jakościowe. Kontynuujesz? (Enter aby kontynuować)")
+                input()
+                quality_confirmed = True
+            
+            total += wait_for_loads(pending)
+            pending = [
+                ex.submit(load_mongo, mg, df_cleaned),
+                ex.submit(load_postgres, pg, df_cleaned),
+            ]
+        total += wait_for_loads(pending)
 
-    for row in rows_iter:
-        # ---------- PostgreSQL (model relacyjny) ----------
-        user_id = pg.upsert_user(row)
-        source_id = pg.get_or_create_source(row.get("source"))
-        tweet_id = pg.insert_tweet(user_id, row, source_id)
-
-        for tag in (row.get("hashtags") or []):
-            tag = (str(tag) or "").strip().lstrip("#").lower()
-            if not tag:
-                continue
-            hid = pg.get_or_create_hashtag(tag)
-            pg.link_tweet_hashtag(tweet_id, hid)
-
-        # ---------- MongoDB (1 kolekcja: 'tweets') ----------
-        mongo_ops.append(InsertOne(build_mongo_doc(row)))
-
-        total += 1
-        if total % BATCH_SIZE == 0:
-            # flush Postgres
-            flush_postgres(pg)
-            # flush Mongo
-            inserted = flush_mongo(mg, mongo_ops)
-            mongo_ops.clear()
-            print(f"✅ Batch {total // BATCH_SIZE}: zapisano {BATCH_SIZE} rekordów (Mongo inserted={inserted}).")
-
-    # final flush
-    flush_postgres(pg)
-    if mongo_ops:
-        inserted = flush_mongo(mg, mongo_ops)
-        mongo_ops.clear()
-        print(f"✅ Finalny batch: Mongo inserted={inserted}")
+        # Indeksy budowane raz na gotowych danych (posortowany skan) zamiast aktualizacji
+        # B-drzew przy każdym wstawionym wierszu; obie bazy równolegle
+        print("🧱 Budowa indeksów...")
+        pg_indexes = ex.submit(pg.init_indexes)
+        mg_indexes = ex.submit(mg.init_indexes)  # indeksy: date, user.user_name, hashtags, is_retweet
+        pg_indexes.result()
+        mg_indexes.result()
 
     elapsed = time.perf_counter() - t0
     print(f"🎉 Gotowe! Załadowano łącznie {total} rekordów w {elapsed:.2f}s.")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEADER = (
+    "user_name,user_location,user_description,user_created,user_followers,user_friends,"
+    "user_favourites,user_verified,date,text,hashtags,source,is_retweet"
+)
+
+# Mały wycinek w formacie Bitcoin_tweets.csv: braki, liczby zmiennoprzecinkowe, duplikat,
+# zła data, hashtagi jako tekst listy i tagi ze znakami spoza ASCII
+ROWS = [
+    'alice,Warsaw,hodler,2019-01-10 10:00:00,12.0,3,1,False,2021-02-10 23:59:04,Bitcoin up,"[\'Bitcoin\', \'#BTC\']","<a href=""x"">Twitter Web App</a>",False',
+    'bob,,,2018-05-01 08:30:00,,7,0,True,2021-02-10 23:58:00,  HODL  ,"[\'ビットコイン\']",Twitter for iPhone,True',
+    'alice,Warsaw,hodler,2019-01-10 10:00:00,12.0,3,1,False,2021-02-10 23:59:04,Bitcoin up,"[\'Bitcoin\', \'#BTC\']","<a href=""x"">Twitter Web App</a>",False',
+    'carol,NYC,desc,2020-03-03 03:03:03,-5,1,2,,not-a-date,bad date,,Twitter Web App,False',
+    ',NYC,desc,2020-03-03 03:03:03,1,1,2,False,2021-02-11 10:00:00,no user,"[\'eth\']",Twitter Web App,',
+    'dave,Berlin,"say ""hi""",2017-07-07 07:07:07,100,50,25,True,2021-02-12 12:00:00,quote \\ test,"[\'#Crypto\', \'defi\']",Twitter Web App,False',
+]
+
+
+@pytest.fixture
+def tweets_csv(tmp_path):
+    path = tmp_path / "tweets.csv"
+    path.write_text("\n".join([HEADER, *ROWS]) + "\n", encoding="utf-8")
+    return str(path)
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from src.db.data_precleaner import DataPrecleaner
+
+
+def test_clean_data_parses_hashtags_without_splitting_long_tags():
+    long_tag = "a" * 70
+    df = pd.DataFrame({"hashtags": [f"['#{long_tag}', 'BTC']", None]})
+
+    cleaned = DataPrecleaner().clean_data(df)
+
+    assert cleaned["hashtags"].tolist() == [[long_tag, "btc"], []]
+
+
+def test_polars_cleaner_matches_pandas(tweets_csv):
+    pytest.importorskip("polars")
+    df = pd.read_csv(tweets_csv)
+    # Kolumna object z tekstem, NaN i liczbą naraz – jak w pełnym pliku tweetów
+    df["user_location"] = df["user_location"].astype(object)
+    df.loc[2, "user_location"] = 5.0
+
+    precleaner = DataPrecleaner()
+    expected = precleaner.clean_data(df.copy())
+    actual = precleaner.clean_data_polars(df.copy())
+
+    assert list(actual.columns) == list(expected.columns)
+    for col in expected.columns:
+        assert actual[col].astype(str).tolist() == expected[col].astype(str).tolist(), col
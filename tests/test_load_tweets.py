@@ -0,0 +1,52 @@
+import pandas as pd
+
+from src.etl.load_tweets import HASHTAG_PATTERN, TWEET_COLUMNS, _normalize_frame, _parse_list, load_csv
+
+
+def test_parse_list_handles_list_literals_and_plain_strings():
+    assert _parse_list("['Bitcoin', '#BTC']") == ["Bitcoin", "BTC"]
+    assert _parse_list("tag1, #tag2") == ["tag1", "tag2"]
+    assert _parse_list(None) == []
+    assert _parse_list(float("nan")) == []
+
+
+def test_hashtag_pattern_keeps_long_and_unicode_tags_whole():
+    long_tag = "a" * 80
+    assert HASHTAG_PATTERN.findall(f"['#{long_tag}', 'ビットコイン']") == [long_tag, "ビットコイン"]
+
+
+def test_normalize_frame_converts_whole_columns():
+    df = pd.DataFrame({
+        "user_followers": ["12.7", None, "x"],
+        "user_friends": [1, 2, 3],
+        "user_favourites": [0.0, 1.0, None],
+        "user_verified": ["True", None, " false "],
+        "user_created": ["2019-01-10 10:00:00", "bad", None],
+        "date": ["2021-02-10 23:59:04", None, "2021-02-11 00:00:00"],
+        "hashtags": ["['a', '#B']", None, "c"],
+    })
+
+    out = _normalize_frame(df)
+
+    assert out["user_followers"].dtype == "Int64"
+    assert out["user_followers"].tolist() == [12, pd.NA, pd.NA]
+    assert out["user_verified"].tolist() == [True, pd.NA, False]
+    assert out["user_created"].isna().tolist() == [False, True, True]
+    assert out["date"].dtype.kind == "M"
+    assert out["hashtags"].tolist() == [["a", "B"], [], ["c"]]
+
+
+def test_load_csv_yields_normalized_records(tweets_csv):
+    records = list(load_csv(tweets_csv, chunksize=2))
+
+    assert len(records) == 6
+    assert all(list(r) == TWEET_COLUMNS for r in records)
+    first = records[0]
+    assert first["user_followers"] == 12
+    assert first["date"] == pd.Timestamp("2021-02-10 23:59:04")
+    assert first["hashtags"] == ["Bitcoin", "BTC"]
+    # Braki jako None, flagi z domyślnym False
+    assert records[1]["user_location"] is None
+    assert records[3]["date"] is None
+    assert records[3]["user_verified"] is False
+    assert records[4]["is_retweet"] is False
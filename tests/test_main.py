@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+from bson import decode
+
+from src.etl.load_tweets import iter_tweets_csv
+import src.main as main
+from src.main import (
+    DATE_COLUMNS, DATE_FORMAT, SeenHashes, analyze_csv_data, build_mongo_docs, clean_csv_data, parse_hashtags,
+)
+
+
+def read_chunk(path):
+    return next(iter_tweets_csv(
+        path, parse_dates=DATE_COLUMNS, date_format=DATE_FORMAT, converters={"hashtags": parse_hashtags},
+    ))
+
+
+def test_parse_hashtags_lowercases_and_strips_hash():
+    assert parse_hashtags("['Bitcoin', '#BTC']") == ("bitcoin", "btc")
+    assert parse_hashtags("") == ()
+
+
+def test_clean_csv_data_dedups_on_user_date_text(tweets_csv):
+    df = read_chunk(tweets_csv)
+    # Ten sam tweet z inną liczbą obserwujących – duplikat po user_name + date + text
+    changed = df.iloc[[0]].assign(user_followers=999.0)
+    df = pd.concat([df, changed], ignore_index=True)
+
+    cleaned = clean_csv_data(df)
+
+    assert cleaned["user_name"].tolist() == ["alice", "dave"]
+    assert cleaned.loc[cleaned["user_name"] == "alice", "user_followers"].item() == 12
+
+
+def test_clean_csv_data_dedups_across_chunks(tweets_csv):
+    chunks = list(iter_tweets_csv(
+        tweets_csv, chunksize=2,
+        parse_dates=DATE_COLUMNS, date_format=DATE_FORMAT, converters={"hashtags": parse_hashtags},
+    ))
+    seen = SeenHashes()
+
+    names = [name for chunk in chunks for name in clean_csv_data(chunk, seen)["user_name"]]
+
+    # Duplikat alice jest w drugiej paczce – usuwany jak przy czyszczeniu całego pliku naraz
+    assert names == ["alice", "dave"]
+    assert len(seen.hashes) == 5
+
+
+def test_clean_csv_data_drops_rows_with_unparseable_dates(tweets_csv):
+    cleaned = clean_csv_data(read_chunk(tweets_csv))
+
+    assert "carol" not in cleaned["user_name"].tolist()
+    assert cleaned["date"].dtype.kind == "M"
+
+
+def test_build_mongo_docs_encodes_nested_user_documents(tweets_csv):
+    cleaned = clean_csv_data(read_chunk(tweets_csv))
+    cleaned.loc[cleaned.index[1], "user_created"] = pd.NaT
+
+    docs = [decode(doc.raw) for doc in build_mongo_docs(cleaned)]
+
+    assert len(docs) == 2
+    alice, dave = docs
+    assert alice["user"]["user_name"] == "alice"
+    assert alice["user"]["user_verified"] is False
+    assert alice["hashtags"] == ["bitcoin", "btc"]
+    assert alice["date"] == pd.Timestamp("2021-02-10 23:59:04").to_pydatetime()
+    assert dave["user"]["user_created"] is None
+    assert dave["is_retweet"] is False
+    assert "_id" not in alice
+
+
+def test_analyze_csv_data_falls_back_to_pandas_when_duckdb_fails(tweets_csv, monkeypatch):
+    duckdb = pytest.importorskip("duckdb")
+
+    def broken(csv_path):
+        raise duckdb.InvalidInputException("Error when sniffing file")
+
+    monkeypatch.setattr(main, "_csv_stats_duckdb", broken)
+    stats = analyze_csv_data(tweets_csv)
+
+    assert stats["total_records"] == 6
+    assert stats["null_counts"]["user_name"] == 1
+    assert stats["unique_counts"]["user_name"] == 4
@@ -0,0 +1,104 @@
+import csv
+
+import numpy as np
+import pandas as pd
+
+from src.db.postgres_manager import STAGE_COLUMNS, PostgresManager, _pg_text_array, _user_digest
+
+
+def test_pg_text_array_escapes_quotes_and_backslashes():
+    assert _pg_text_array([]) == "{}"
+    assert _pg_text_array(["btc", 'say "hi"', "a\\b"]) == '{"btc","say \\"hi\\"","a\\\\b"}'
+
+
+def test_staging_csv_layout():
+    df = pd.DataFrame([{
+        "user_name": "alice",
+        "user_location": None,
+        "user_description": 'say "hi"',
+        "user_created": pd.Timestamp("2019-01-10 10:00:00"),
+        "user_followers": 12.0,
+        "user_friends": np.nan,
+        "user_favourites": 1,
+        "user_verified": "True",
+        "date": pd.Timestamp("2021-02-10 23:59:04"),
+        "text": "Bitcoin, up",
+        "hashtags": ("Bitcoin", "#BTC"),
+        "source": "Twitter Web App",
+        "is_retweet": False,
+    }])
+
+    rows = list(csv.reader(PostgresManager._staging_csv(df)))
+
+    assert len(rows) == 1
+    row = dict(zip(STAGE_COLUMNS, rows[0]))
+    assert row["user_location"] == "\\N"
+    assert row["user_description"] == 'say "hi"'
+    assert row["user_followers"] == "12"
+    assert row["user_friends"] == "\\N"
+    assert row["user_verified"] == "True"
+    assert row["date"] == "2021-02-10 23:59:04"
+    assert row["text"] == "Bitcoin, up"
+    # Staging dostaje surowe tagi – normalizuje je serwer (NORMALIZED_TAGS)
+    assert row["hashtags"] == '{"Bitcoin","#BTC"}'
+
+
+def test_user_digest_treats_missing_values_as_equal():
+    a = ("alice", "Warsaw", float("nan"), np.float64("nan"), pd.NaT)
+    b = ("alice", "Warsaw", float("nan"), np.float64("nan"), pd.NaT)
+    assert _user_digest(a) == _user_digest(b)
+    assert _user_digest(a) != _user_digest(("alice", "Berlin", None, None, None))
+
+
+class RecordingManager(PostgresManager):
+    """PostgresManager bez połączenia – helpery *_bulk zapamiętują, co trafiłoby do execute_values."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def upsert_users_bulk(self, rows, page_size=None):
+        self.calls["users"] = rows
+        return {row[0]: i for i, row in enumerate(rows, 1)}
+
+    def get_or_create_sources_bulk(self, names, page_size=None):
+        names = [name for name in names if name]
+        return {name: i for i, name in enumerate(names, 1)}
+
+    def insert_tweets_bulk(self, rows, page_size=None):
+        self.calls["tweets"] = rows
+        return list(range(1, len(rows) + 1))
+
+    def get_or_create_hashtags_bulk(self, tags, page_size=None):
+        return {tag: i for i, tag in enumerate(sorted(set(tags)), 1)}
+
+    def link_tweet_hashtags_bulk(self, pairs, page_size=None):
+        self.calls["links"] = pairs
+
+
+def test_insert_batch_normalizes_missing_values_and_flags():
+    df = pd.DataFrame({
+        "user_name": ["alice", np.nan],
+        "user_location": ["Warsaw", np.nan],
+        "user_description": [None, "desc"],
+        "user_created": [pd.NaT, pd.Timestamp("2019-01-10 10:00:00")],
+        "user_followers": pd.array([12, pd.NA], dtype="Int64"),
+        "user_friends": [np.nan, 3.0],
+        "user_favourites": [1, 2],
+        "user_verified": ["False", np.nan],
+        "date": [pd.Timestamp("2021-02-10 23:59:04"), pd.NaT],
+        "text": ["Bitcoin up", "no user"],
+        "hashtags": [("Bitcoin", "#BTC"), ()],
+        "source": ["Twitter Web App", None],
+        "is_retweet": ["True", "false"],
+    })
+    pg = RecordingManager()
+
+    assert pg._insert_batch(list(pg._staging_records(df))) == 2
+
+    # Wiersz bez user_name nie tworzy użytkownika, a jego tweet dostaje user_id NULL
+    assert pg.calls["users"] == [("alice", "Warsaw", None, None, 12, None, 1, False)]
+    assert pg.calls["tweets"] == [
+        (1, pd.Timestamp("2021-02-10 23:59:04"), "Bitcoin up", 1, True),
+        (None, None, "no user", None, False),
+    ]
+    assert sorted(pg.calls["links"]) == [(1, 1), (1, 2)]